@@ -0,0 +1,56 @@
+"""
+Bus benchmark: end-to-end query latency and polling rate (host only)
+---------------------------------
+Runs the real receive path against SimBus, which delivers reply bytes at
+baud-rate-accurate times, and reports S_CPOS round-trip latency and the
+sustained position reads per second for 1..6 motors at several baud rates,
+plus the time for one pipelined Correlator sweep of six motors.
+"""
+
+import sys
+import time
+
+sys.path.append(".")
+from utils.stepperMotorControl import Real_time_location
+from utils.motorSimulator import SimBus
+from utils.telemetryPoller import PollScheduler
+from utils.correlator import Correlator
+
+BAUDRATES = (115200, 460800, 921600)
+MOTORS = (1, 2, 4, 6)
+
+def query_latency_us(baudrate, n=200):
+    bus = SimBus([1], baudrate=baudrate)
+    t0 = time.perf_counter()
+    for _ in range(n):
+        Real_time_location(bus, 1)
+    return (time.perf_counter() - t0) * 1e6 / n
+
+def reads_per_second(baudrate, motors, duration=0.25):
+    bus = SimBus(range(1, motors + 1), baudrate=baudrate)
+    poller = PollScheduler(bus, range(1, motors + 1), params=("S_CPOS",))
+    t0 = time.perf_counter()
+    while time.perf_counter() - t0 < duration:
+        poller.poll_once()
+    return (poller.cycles * motors - poller.dropped) / (time.perf_counter() - t0)
+
+def sweep_ms(baudrate, motors, n=20):  # Pipelined S_CPOS/S_VEL/S_FLAG sweep of every motor
+    bus = SimBus(range(1, motors + 1), baudrate=baudrate)
+    cor = Correlator(bus)
+    t0 = time.perf_counter()
+    for _ in range(n):
+        cor.sweep(range(1, motors + 1), ("S_CPOS", "S_VEL", "S_FLAG"))
+    return (time.perf_counter() - t0) * 1e3 / n
+
+def run():
+    results = {}
+    for baud in BAUDRATES:
+        results["bus.latency_us.S_CPOS@{}".format(baud)] = query_latency_us(baud)
+        for m in MOTORS:
+            results["bus.reads_per_s.{}motors@{}".format(m, baud)] = reads_per_second(baud, m)
+        results["bus.sweep_ms.6motors@{}".format(baud)] = sweep_ms(baud, 6)
+    return results
+
+if __name__ == "__main__":
+    for k, v in sorted(run().items()):
+        print("{:<40} {:10.1f}".format(k, v))
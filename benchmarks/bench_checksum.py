@@ -0,0 +1,33 @@
+"""
+Checksum benchmark: per-frame cost of each check byte mode
+---------------------------------
+Times Pos_Control_Into and Parse_Frame on an S_CPOS reply under the fixed
+0x6B, XOR and table-driven CRC-8 modes.
+"""
+
+import sys
+
+sys.path.append(".")
+from benchmarks.benchlib import measure
+from utils.stepperMotorControl import (Set_Checksum, Checksum, Pos_Control_Into, Parse_Frame,
+                                       CHECK_6B, CHECK_XOR, CHECK_CRC8)
+
+MODES = (("6B", CHECK_6B), ("XOR", CHECK_XOR), ("CRC8", CHECK_CRC8))
+
+def run(n=5000):
+    results = {}
+    buf = bytearray(16)
+    frame = bytearray(b"\x01\x36\x01\x00\x01\x23\x45\x00")
+    try:
+        for name, mode in MODES:
+            Set_Checksum(mode)
+            frame[7] = Checksum(frame, 0, 7)
+            results["checksum.encode_ns." + name] = measure(lambda: Pos_Control_Into(buf, 0, 1, 0, 1000, 50, 3200, False, False), n)
+            results["checksum.parse_ns." + name] = measure(lambda: Parse_Frame(frame, 8), n)
+    finally:
+        Set_Checksum(CHECK_6B)
+    return results
+
+if __name__ == "__main__":
+    for k, v in sorted(run().items()):
+        print("{:<40} {:10.1f}".format(k, v))
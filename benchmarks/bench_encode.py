@@ -0,0 +1,53 @@
+"""
+Encode benchmark: ns per command for every builder
+---------------------------------
+Times each allocating builder and its zero-copy *_Into counterpart, and
+the NumPy batch encoder per frame when NumPy is installed.
+"""
+
+import sys
+
+sys.path.append(".")
+from benchmarks.benchlib import measure
+from utils import stepperMotorControl as smc
+
+ARGS = {
+    "Read_Sys_Params": (1, "S_CPOS"),
+    "Reset_CurPos_To_Zero": (1,),
+    "Reset_Clog_Pro": (1,),
+    "Modify_Ctrl_Mode": (1, False, 2),
+    "En_Control": (1, True, False),
+    "Vel_Control": (1, 0, 1000, 50, False),
+    "Pos_Control": (1, 0, 1000, 50, 3200, False, False),
+    "Stop_Now": (1, False),
+    "Synchronous_motion": (0,),
+    "Origin_Set_O": (1, False),
+    "Origin_Modify_Params": (1, False, 0, 0, 30, 10000, 300, 800, 60, False),
+    "Origin_Trigger_Return": (1, 0, False),
+    "Origin_Interrupt": (1,),
+}
+
+def run(n=5000):
+    results = {}
+    buf = bytearray(32)
+    for name, args in ARGS.items():
+        build = getattr(smc, name)
+        into = getattr(smc, name + "_Into")
+        results["encode." + name] = measure(lambda: build(*args), n)
+        results["encode." + name + "_Into"] = measure(lambda: into(buf, 0, *args), n)
+    results.update(run_batch())
+    return results
+
+def run_batch(frames=10000, n=20):  # ns per frame for the NumPy encoder, host only
+    try:
+        import numpy as np
+        from utils.batchEncoder import Pos_Control_Batch
+    except ImportError:
+        return {}
+    clk = np.arange(frames, dtype=np.int64) * 16
+    encode = lambda: Pos_Control_Batch(1, 0, 1000, 50, clk, True, False)
+    return {"encode.Pos_Control_Batch_per_frame": measure(encode, n) / frames}
+
+if __name__ == "__main__":
+    for k, v in sorted(run().items()):
+        print("{:<40} {:10.1f} ns".format(k, v))
@@ -0,0 +1,32 @@
+"""
+Constant frame benchmark: FrameTable lookup vs. building per call
+---------------------------------
+Reports ns per frame for the parameterless commands, built by the builder
+each time versus handed out from a precompiled FrameTable.
+"""
+
+import sys
+
+sys.path.append(".")
+from benchmarks.benchlib import measure
+from utils.stepperMotorControl import (FrameTable, Read_Sys_Params, Reset_CurPos_To_Zero, Reset_Clog_Pro,
+                                       Synchronous_motion, Origin_Interrupt)
+
+def run(n=5000):
+    table = FrameTable(range(1, 7))
+    cases = (
+        ("Read_Sys_Params.S_CPOS", lambda: Read_Sys_Params(3, "S_CPOS"), lambda: table.query["S_CPOS"][3]),
+        ("Reset_CurPos_To_Zero", lambda: Reset_CurPos_To_Zero(3), lambda: table.zero[3]),
+        ("Reset_Clog_Pro", lambda: Reset_Clog_Pro(3), lambda: table.clog[3]),
+        ("Synchronous_motion", lambda: Synchronous_motion(3), lambda: table.sync[3]),
+        ("Origin_Interrupt", lambda: Origin_Interrupt(3), lambda: table.interrupt[3]),
+    )
+    results = {}
+    for name, build, lookup in cases:
+        results["frames.build." + name] = measure(build, n)
+        results["frames.table." + name] = measure(lookup, n)
+    return results
+
+if __name__ == "__main__":
+    for k, v in sorted(run().items()):
+        print("{:<44} {:10.1f} ns".format(k, v))
@@ -0,0 +1,50 @@
+"""
+Parse benchmark: legacy hex-string round trip vs. binary Parse_Frame
+---------------------------------
+Decodes the same S_CPOS response both ways and reports microseconds per
+frame, plus Parse_Frame on the other common replies.
+"""
+
+import sys
+import struct
+
+sys.path.append(".")
+from benchmarks.benchlib import measure
+from utils.stepperMotorControl import Parse_Frame
+
+FRAME = bytearray(b"\x01\x36\x01\x00\x01\x23\x45\x6B")  # addr 1, S_CPOS, -4.5 turns
+
+FRAMES = {
+    "S_CPOS": FRAME,
+    "S_VEL": bytearray(b"\x01\x35\x00\x03\xE8\x6B"),
+    "S_FLAG": bytearray(b"\x01\x3A\x03\x6B"),
+    "ack": bytearray(b"\x01\xFD\x02\x6B"),
+    "S_State": bytearray(bytes.fromhex("01431f095dc0012c1a2b0000000c80000258000000064000000000000303") + b"\x6B"),
+}
+
+def legacy(raw):  # Receive_Data + Real_time_location decode path
+    hex_data = " ".join(["{:02x}".format(b) for b in raw])
+    hex_data = hex_data.strip("00 ")
+    if hex_data and hex_data[0] != "0":
+        hex_data = "0" + hex_data
+    data_hex = hex_data.split()
+    if int(data_hex[0], 16) == 0x01 and int(data_hex[1], 16) == 0x36:
+        pos = struct.unpack(">I", bytes.fromhex("".join(data_hex[3:7])))[0]
+        deg = float(pos) * 360.0 / 65536.0
+        return -deg if int(data_hex[2], 16) else deg
+
+def binary(raw):
+    return Parse_Frame(raw, len(raw)).value
+
+def run(n=5000):
+    assert abs(legacy(FRAME) - binary(FRAME)) < 1e-9
+    results = {"parse.legacy_hex.S_CPOS": measure(lambda: legacy(FRAME), n) / 1000.0}
+    for name, raw in FRAMES.items():
+        results["parse.binary." + name] = measure(lambda: binary(raw), n) / 1000.0
+    return results
+
+if __name__ == "__main__":
+    results = run()
+    for k, v in sorted(results.items()):
+        print("{:<40} {:8.2f} us/frame".format(k, v))
+    print("speedup {:.1f}x".format(results["parse.legacy_hex.S_CPOS"] / results["parse.binary.S_CPOS"]))
@@ -0,0 +1,58 @@
+"""
+Shared helpers for the benchmark suite
+---------------------------------
+Timing that works on CPython and MicroPython, and a results history so each
+run is compared against the previous one.
+"""
+
+import sys
+import time
+
+sys.path.append(".")
+from utils.stepperMotorControl import ticks_us, ticks_diff
+
+try:
+    import json
+except ImportError:  # Older MicroPython ports
+    import ujson as json
+
+try:
+    _now_ns = time.perf_counter_ns  # CPython
+    _diff_ns = lambda a, b: a - b
+except AttributeError:  # MicroPython: microsecond ticks
+    _now_ns = ticks_us
+    _diff_ns = lambda a, b: ticks_diff(a, b) * 1000
+
+RESULTS_FILE = "benchmarks/results.json"
+
+def measure(fn, n=10000):  # Average ns per call of fn()
+    fn()
+    t0 = _now_ns()
+    for _ in range(n):
+        fn()
+    return _diff_ns(_now_ns(), t0) / n
+
+def load_history(path=RESULTS_FILE):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return []
+
+def record(results, path=RESULTS_FILE, keep=50):  # Append a run, print deltas against the previous one on this platform
+    history = load_history(path)
+    platform = sys.implementation.name
+    prev = None
+    for run in reversed(history):
+        if run.get("platform") == platform:
+            prev = run["results"]
+            break
+    for name in sorted(results):
+        value = results[name]
+        line = "{:<40} {:12.1f}".format(name, value)
+        if prev and prev.get(name):
+            line += "  {:+6.1f}%".format((value - prev[name]) * 100.0 / prev[name])
+        print(line)
+    history.append({"platform": platform, "time": time.time(), "results": results})
+    with open(path, "w") as f:
+        json.dump(history[-keep:], f)
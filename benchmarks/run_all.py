@@ -0,0 +1,36 @@
+"""
+Benchmark suite entry point
+---------------------------------
+Run from the repository root:
+
+    python benchmarks/run_all.py
+
+Results are appended to benchmarks/results.json and each value is printed
+with its change against the previous run on the same platform. The bus
+benchmark needs the host-side simulator and is skipped on MicroPython.
+"""
+
+import sys
+
+sys.path.append(".")
+from benchmarks.benchlib import record
+from benchmarks import bench_encode, bench_parse, bench_checksum, bench_frames
+
+def main():
+    results = {}
+    results.update(bench_encode.run())
+    results.update(bench_parse.run())
+    results.update(bench_checksum.run())
+    results.update(bench_frames.run())
+    try:
+        if sys.implementation.name == "micropython":
+            raise ImportError("host only")
+        from benchmarks import bench_bus
+    except (ImportError, AttributeError):  # AttributeError: no time.perf_counter
+        print("bench_bus skipped: simulator not available on this platform")
+    else:
+        results.update(bench_bus.run())
+    record(results)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import stepperMotorControl as smc
+
+def reply(*data):  # Response frame with the check byte of the current mode appended
+    buf = bytearray(data)
+    return bytes(buf) + bytes((smc.Checksum(buf, 0, len(buf)),))
+
+class SimClock:  # Stepped clock: every reading advances time, so simulated runs never depend on the host's speed
+    def __init__(self, step_s=0.00001):
+        self.t = 0.0
+        self.step_s = step_s
+
+    def __call__(self):  # Seconds, the SimBus clock
+        self.t += self.step_s
+        return self.t
+
+    def ticks_ms(self):
+        return int(self() * 1000)
+
+    def ticks_us(self):
+        return int(self() * 1000000)
+
+    def sleep_ms(self, ms):
+        self.t += ms / 1000.0
+
+    def sleep(self, s):
+        self.t += s
+
+@pytest.fixture
+def clock(monkeypatch):  # SimClock driving the ticks API of every utils module; pass it to SimBus(clock=...)
+    c = SimClock()
+    for name, mod in list(sys.modules.items()):
+        if name.startswith("utils.") and mod is not None:
+            for attr in ("ticks_ms", "ticks_us", "sleep_ms"):
+                if hasattr(mod, attr):
+                    monkeypatch.setattr(mod, attr, getattr(c, attr))
+    return c
+
+class ScriptUart:  # UART stand-in that answers each written frame from a handler
+    def __init__(self, handler=None):
+        self.handler = handler  # handler(frame) -> reply bytes or None
+        self.written = []
+        self.pending = bytearray()
+
+    def feed(self, data):
+        self.pending += data
+
+    def write(self, buf):
+        frame = bytes(buf)
+        self.written.append(frame)
+        if self.handler is not None:
+            data = self.handler(frame)
+            if data:
+                self.pending += data
+        return len(frame)
+
+    def any(self):
+        return len(self.pending)
+
+    def readinto(self, buf, n=None):
+        n = min(len(buf), len(self.pending) if n is None else n)
+        if not n:
+            return None
+        buf[:n] = self.pending[:n]
+        del self.pending[:n]
+        return n
+
+    def read(self, n=None):
+        n = len(self.pending) if n is None else min(n, len(self.pending))
+        if not n:
+            return None
+        data = bytes(self.pending[:n])
+        del self.pending[:n]
+        return data
+
+@pytest.fixture(autouse=True)
+def default_checksum():  # Every test starts and ends in 0x6B mode with no S_State downgrades
+    smc.Set_Checksum(smc.CHECK_6B)
+    smc._noState.clear()
+    yield
+    smc.Set_Checksum(smc.CHECK_6B)
+    smc._noState.clear()
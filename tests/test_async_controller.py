@@ -0,0 +1,48 @@
+import asyncio
+
+from utils.stepperMotorControl import Pos_Control, Read_Sys_Params, RESP_OK
+from utils.motorSimulator import SimBus, sim_streams
+from utils.uartReceiver import StreamReceiver
+from utils.asyncController import MotorController
+
+def run(coro):
+    return asyncio.run(coro)
+
+async def controller(bus):
+    reader, writer = sim_streams(bus)
+    return MotorController(writer, StreamReceiver(reader), timeout_ms=1000), writer
+
+def test_request_after_sync_move_gets_its_own_ack():
+    async def main():
+        bus = SimBus([1, 2, 3, 4], baudrate=0, latency_s=0)  # Replies are ready the moment a command is written
+        ctl, writer = await controller(bus)
+        await ctl.sync_move([(a, 3200, 600, 0) for a in (1, 2, 3, 4)])
+        frame = await ctl.request(Pos_Control(3, 0, 600, 0, 3200, False, False))
+        ctl.close()
+        writer.close()
+        return frame
+    frame = run(main())
+    assert (frame.addr, frame.func, frame.value) == (3, 0xFD, RESP_OK)
+
+def test_query_skips_replies_from_other_motors():
+    async def main():
+        bus = SimBus([1, 2], baudrate=0, latency_s=0)
+        bus.motors[2].pos = 0.25
+        ctl, writer = await controller(bus)
+        bus.write(Read_Sys_Params(1, "S_CPOS"))  # Stray S_CPOS reply from motor 1 ahead of the real one
+        value = await ctl.query(2, "S_CPOS")
+        ctl.close()
+        writer.close()
+        return value
+    assert run(main()) == 90.0
+
+def test_read_state_in_one_transaction():
+    async def main():
+        bus = SimBus([5], baudrate=0, latency_s=0)
+        ctl, writer = await controller(bus)
+        state = await ctl.read_state(5)
+        ctl.close()
+        writer.close()
+        return state, ctl.transactions
+    state, transactions = run(main())
+    assert state.cpos == 0.0 and transactions == 1
@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+from utils.stepperMotorControl import Pos_Control, Stop_Now, RESP_OK
+from utils.motorSimulator import SimBus, sim_streams
+from utils.uartReceiver import StreamReceiver
+from utils.asyncController import MotorController
+from utils.busManager import Bus, BusManager, AsyncBusManager
+
+def two_buses(clock, a=(1, 2, 3), b=(4, 5, 6)):
+    left, right = SimBus(list(a), clock=clock), SimBus(list(b), clock=clock)
+    routes = dict([(x, left) for x in a] + [(x, right) for x in b])
+    return left, right, routes
+
+def test_commands_reach_the_owning_bus(clock):
+    left, right, routes = two_buses(clock)
+    mgr = BusManager(routes, timeout_ms=20, threads=False)
+    assert [bus.addrs for bus in mgr.buses] == [[1, 2, 3], [4, 5, 6]]
+    assert mgr.uart(5) is right
+    assert mgr.request(Pos_Control(5, 0, 600, 0, 3200, False, False)) == RESP_OK
+    assert right.motors[5].target == 1.0 and left.frames_in == 0
+    mgr.send(Stop_Now(0, False))  # Broadcasts go to every bus
+    assert (left.frames_in, right.frames_in) == (1, 2)
+
+def test_query_all_covers_every_bus(clock):
+    left, right, routes = two_buses(clock)
+    right.motors[6].pos = right.motors[6].target = 0.5
+    mgr = BusManager(routes, timeout_ms=20, threads=False)
+    assert mgr.query_all("S_CPOS") == {1: 0.0, 2: 0.0, 3: 0.0, 4: 0.0, 5: 0.0, 6: 180.0}
+    assert mgr.query_all("S_CPOS", addrs=[2, 6]) == {2: 0.0, 6: 180.0}
+    assert mgr.query(6, "S_CPOS") == 180.0
+
+@pytest.mark.parametrize("threads", (False, True))
+def test_parallel_hands_each_job_its_bus(clock, threads):
+    left, right, routes = two_buses(clock)
+    mgr = BusManager(routes, timeout_ms=20, threads=threads)
+    assert mgr.parallel(lambda bus: (isinstance(bus, Bus), bus.uart, list(bus.addrs))) == \
+        [(True, left, [1, 2, 3]), (True, right, [4, 5, 6])]
+    mgr.close()
+
+def test_sync_move_loads_then_triggers_every_bus(clock):
+    left, right, routes = two_buses(clock, a=range(1, 11), b=(11,))
+    mgr = BusManager(routes, timeout_ms=20, threads=False)
+    moves = [(a, 3200, 600, 0) for a in range(1, 12)]
+    assert mgr.sync_move(moves) == 2
+    assert len(mgr.buses[0].sync) >= 10 * 13 + 4  # Grew past the default eight joints
+    clock.sleep(0.01)
+    left.read(), right.read()
+    assert all(routes[a].motors[a].target == 1.0 for a in range(1, 12))
+
+def test_async_sync_move_waits_for_every_ack():
+    async def main():
+        left, right = SimBus([1, 2], baudrate=0, latency_s=0), SimBus([3], baudrate=0, latency_s=0)
+        ctls, writers = [], []
+        for bus in (left, right):
+            reader, writer = sim_streams(bus)
+            ctls.append(MotorController(writer, StreamReceiver(reader), timeout_ms=1000))
+            writers.append(writer)
+        mgr = AsyncBusManager({1: ctls[0], 2: ctls[0], 3: ctls[1]})
+        n = await mgr.sync_move([(1, 3200, 600, 0), (2, 6400, 600, 0), (3, -3200, 600, 0)])
+        values = await mgr.query_all("S_TPOS")
+        for ctl, writer in zip(ctls, writers):
+            ctl.close()
+            writer.close()
+        return n, values
+    n, values = asyncio.run(main())
+    assert n == 2 and values == {1: 360.0, 2: 720.0, 3: -360.0}
@@ -0,0 +1,65 @@
+from utils import stepperMotorControl as smc
+from utils.stepperMotorControl import Read_Sys_Params
+from utils.correlator import Correlator
+from utils.busStats import BusStats
+
+from conftest import reply, ScriptUart
+
+def test_replies_complete_their_own_request_in_any_order(clock):
+    uart = ScriptUart()
+    cor = Correlator(uart, timeout_ms=20, max_in_flight=2)
+    got = []
+    cb = lambda addr, func, value: got.append((addr, func, value))
+    cor.submit(Read_Sys_Params(1, "S_CPOS"), callback=cb)
+    cor.submit(Read_Sys_Params(2, "S_FLAG"), callback=cb)
+    uart.feed(reply(0x02, 0x3A, 0x03) + reply(0x01, 0x36, 0x00, 0x00, 0x00, 0x80, 0x00))
+    while cor.pending:
+        cor.poll()
+    assert got == [(2, 0x3A, 3), (1, 0x36, 180.0)]
+
+def test_next_motor_waits_for_the_line(clock):
+    uart = ScriptUart()
+    cor = Correlator(uart)
+    cor.submit(Read_Sys_Params(1, "S_CPOS"))
+    cor.submit(Read_Sys_Params(1, "S_FLAG"))
+    cor.submit(Read_Sys_Params(2, "S_CPOS"))
+    assert uart.written == [bytes(Read_Sys_Params(1, "S_CPOS")), bytes(Read_Sys_Params(1, "S_FLAG"))]
+    uart.feed(reply(0x01, 0x36, 0x00, 0x00, 0x00, 0x00, 0x00))
+    cor.poll()
+    assert len(uart.written) == 2 and cor.inflight == 1  # Motor 1 still answering
+    uart.feed(reply(0x01, 0x3A, 0x03))
+    cor.poll()
+    assert uart.written[2] == bytes(Read_Sys_Params(2, "S_CPOS"))
+
+def test_held_requests_go_out_in_one_write(clock):
+    uart = ScriptUart()
+    cor = Correlator(uart)
+    cor.submit(Read_Sys_Params(1, "S_CPOS"))
+    cor.queue(Read_Sys_Params(2, "S_CPOS"))
+    cor.queue(Read_Sys_Params(2, "S_VEL"))
+    uart.feed(reply(0x01, 0x36, 0x00, 0x00, 0x00, 0x00, 0x00))
+    cor.poll()
+    assert uart.written[1] == bytes(Read_Sys_Params(2, "S_CPOS")) + bytes(Read_Sys_Params(2, "S_VEL"))
+
+def test_error_reply_fails_the_oldest_request_to_that_motor(clock):
+    uart = ScriptUart()
+    cor = Correlator(uart)
+    a = cor.submit(Read_Sys_Params(1, "S_CPOS"))
+    b = cor.submit(Read_Sys_Params(1, "S_VEL"))
+    uart.feed(reply(0x01, 0x00, 0xEE))
+    cor.poll()
+    assert cor.done[a] and cor.values[a] is None and not cor.done[b]
+
+def test_expired_requests_reach_bus_stats(clock):
+    stats = BusStats()
+    smc.Attach_Stats(stats)
+    try:
+        cor = Correlator(ScriptUart(), timeout_ms=5)
+        cor.submit(Read_Sys_Params(3, "S_PERR"))
+        cor.submit(Read_Sys_Params(4, "S_PERR"))
+        while cor.pending:
+            cor.poll()
+    finally:
+        smc.Attach_Stats(None)
+    assert cor.timeouts == 2 and stats.timeouts == 2
+    assert stats.timeouts_by_func == {0x37: 2}
@@ -0,0 +1,88 @@
+import pytest
+
+from utils import stepperMotorControl as smc
+from utils.stepperMotorControl import (Pos_Control, Pos_Control_Into, Read_Sys_Params, Read_Sys_Params_Into,
+                                       FrameTable, Reset_CurPos_To_Zero, Reset_Clog_Pro, Origin_Interrupt,
+                                       Synchronous_motion, Sync_Move_Into, Sync_Move_Length, Sync_Move_Buffer, Command_Length,
+                                       Check_Ok, Parse_Frame)
+
+from conftest import reply
+
+MODES = (smc.CHECK_6B, smc.CHECK_XOR, smc.CHECK_CRC8)
+
+def test_into_matches_builder():
+    buf = bytearray(32)
+    n = Pos_Control_Into(buf, 3, 1, 1, 1200, 50, 3200, True, False)
+    assert bytes(buf[3:3 + n]) == bytes(Pos_Control(1, 1, 1200, 50, 3200, True, False))
+    n = Read_Sys_Params_Into(buf, 0, 4, "S_State")
+    assert bytes(buf[:n]) == bytes(Read_Sys_Params(4, "S_State")) == b"\x04\x43\x7a\x6b"
+
+def test_sync_move_is_snf_moves_plus_trigger():
+    buf = bytearray(64)
+    n = Sync_Move_Into(buf, 0, [(1, 3200, 600, 50), (2, -1600, 300, 0)])
+    expected = (bytes(Pos_Control(1, 0, 600, 50, 3200, True, True)) + bytes(Pos_Control(2, 1, 300, 0, 1600, True, True))
+                + bytes(Synchronous_motion(0)))
+    assert bytes(buf[:n]) == expected
+
+def test_command_length_splits_a_burst():
+    burst = bytes(Pos_Control(1, 0, 600, 50, 3200, True, True)) + bytes(Read_Sys_Params(2, "S_State")) \
+        + bytes(Read_Sys_Params(3, "S_CPOS")) + bytes(Synchronous_motion(0))
+    lengths = []
+    i = 0
+    while i < len(burst):
+        lengths.append(Command_Length(burst, i, len(burst)))
+        i += lengths[-1]
+    assert lengths == [13, 4, 3, 4]
+
+@pytest.mark.parametrize("mode", MODES)
+def test_checksum_modes_round_trip(mode):
+    smc.Set_Checksum(mode)
+    cmd = bytes(Pos_Control(1, 0, 600, 50, 3200, True, False))
+    assert Check_Ok(cmd, 0, len(cmd))
+    assert not Check_Ok(cmd[:-1] + bytes((cmd[-1] ^ 0x01,)), 0, len(cmd))
+    frame = Parse_Frame(reply(0x01, 0x36, 0x01, 0x00, 0x00, 0x80, 0x00))
+    assert (frame.addr, frame.func, frame.value) == (1, 0x36, -180.0)
+
+def test_checksum_mode_values():
+    data = bytes((0x01, 0x36))
+    smc.Set_Checksum(smc.CHECK_6B)
+    assert smc.Checksum(data, 0, 2) == 0x6B
+    smc.Set_Checksum(smc.CHECK_XOR)
+    assert smc.Checksum(data, 0, 2) == 0x37
+    smc.Set_Checksum(smc.CHECK_CRC8)
+    assert smc.Checksum(b"123456789", 0, 9) == 0xF4  # CRC-8/SMBUS check value
+
+@pytest.mark.parametrize("mode", MODES)
+def test_batch_encoder_matches_pos_control(mode):
+    np = pytest.importorskip("numpy")
+    from utils.batchEncoder import Pos_Control_Batch
+    smc.Set_Checksum(mode)
+    addr = np.array([1, 2, 3, 4])
+    dir = np.array([0, 1, 0, 1])
+    vel = np.array([1, 600, 3000, 0xFFFF])
+    acc = np.array([0, 50, 255, 10])
+    clk = np.array([0, 3200, 0x12345678, 0xFFFFFFFF])
+    frames = Pos_Control_Batch(addr, dir, vel, acc, clk, True, False)
+    expected = b"".join(bytes(Pos_Control(*(int(v) for v in args), True, False))
+                        for args in zip(addr, dir, vel, acc, clk))
+    assert frames.tobytes() == expected
+
+def test_sync_move_buffer_grows_only_when_needed():
+    buf = bytearray(Sync_Move_Length(2))
+    assert Sync_Move_Buffer(buf, 2) is buf
+    big = Sync_Move_Buffer(buf, 9)
+    assert len(big) == Sync_Move_Length(9) == 9 * 13 + 4
+    moves = [(a, 100 * a, 300, 0) for a in range(1, 10)]
+    assert Sync_Move_Into(big, 0, moves) == len(big)
+
+@pytest.mark.parametrize("mode", MODES)
+def test_frame_table_matches_builders(mode):
+    smc.Set_Checksum(mode)
+    table = FrameTable([2, 5])
+    for addr in (0, 2, 5):  # Address 0 is the broadcast form, always built
+        assert table.zero[addr] == bytes(Reset_CurPos_To_Zero(addr))
+        assert table.clog[addr] == bytes(Reset_Clog_Pro(addr))
+        assert table.sync[addr] == bytes(Synchronous_motion(addr))
+        assert table.interrupt[addr] == bytes(Origin_Interrupt(addr))
+    assert table.query["S_CPOS"][5] == bytes(Read_Sys_Params(5, "S_CPOS"))
+    assert table.query["S_CPOS"][0] is None and table.sync[1] is None
@@ -0,0 +1,34 @@
+from utils.stepperMotorControl import Sync_Move
+from utils.motorSimulator import SimBus
+from utils.followingMonitor import FollowingMonitor
+
+def moving_bus(clock, addrs):
+    bus = SimBus(addrs, baudrate=460800, clock=clock)
+    Sync_Move(bus, [(a, 32000, 600, 0) for a in addrs])  # Ten revolutions at 10 rev/s
+    return bus
+
+def test_quiet_arm_never_trips(clock):
+    bus = moving_bus(clock, [1, 2, 3])
+    mon = FollowingMonitor(bus, [1, 2, 3], max_error_deg=5.0)
+    mon.run(100)
+    assert mon.cycles > 10 and not mon.faults and mon.cor.timeouts == 0 and bus.collisions == 0
+
+def test_jammed_joint_stops_the_arm(clock):
+    bus = moving_bus(clock, [1, 2, 3])
+    mon = FollowingMonitor(bus, [1, 2, 3], max_error_deg=5.0, max_trend_deg_s=1e9)
+    mon.run(20)
+    bus.motors[2].jammed = True
+    assert mon.run(200) == {2: "error"}
+    assert 5.0 < abs(mon.error[1]) < 30.0  # Caught well before stall protection (180 degrees)
+    clock.sleep(0.01)
+    bus.read()
+    assert all(bus.motors[a].vel == 0.0 for a in (1, 2, 3))  # stop_all halted every joint
+
+def test_stop_only_the_faulty_joint(clock):
+    bus = moving_bus(clock, [1, 2])
+    mon = FollowingMonitor(bus, [1, 2], max_trend_deg_s=1e9, stop_all=False)
+    bus.motors[1].jammed = True
+    assert mon.run(200) == {1: "error"}
+    clock.sleep(0.01)
+    bus.read()
+    assert bus.motors[1].vel == 0.0 and bus.motors[2].vel > 0.0
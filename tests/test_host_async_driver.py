@@ -0,0 +1,55 @@
+import asyncio
+
+from utils.stepperMotorControl import Read_Sys_Params
+from utils.motorSimulator import SimBus, sim_streams
+from utils.hostAsyncDriver import AsyncDriver
+
+from conftest import reply, SimClock
+
+class _Writer:  # Records writes instead of sending them
+    def __init__(self):
+        self.written = []
+
+    def write(self, data):
+        self.written.append(bytes(data))
+
+    def close(self):
+        pass
+
+def gather_positions(timeout=1.0, **kwargs):
+    async def main():
+        bus = SimBus(range(1, 7), clock=SimClock(0.0001))
+        reader, writer = sim_streams(bus)
+        driver = AsyncDriver(reader, writer, timeout=timeout, **kwargs)
+        values = await asyncio.gather(*(driver.query(a, "S_CPOS") for a in range(1, 7)))
+        await driver.close()
+        return values, bus.collisions
+    return asyncio.run(main())
+
+def test_default_queries_one_motor_at_a_time():
+    values, collisions = gather_positions()
+    assert values == [0.0] * 6 and collisions == 0
+
+def test_max_in_flight_overlaps_motors():
+    values, collisions = gather_positions(0.1, max_in_flight=6)
+    assert collisions > 0 and None in values
+
+def test_error_reply_fails_the_oldest_request():
+    async def main():
+        reader = asyncio.StreamReader()
+        driver = AsyncDriver(reader, _Writer(), timeout=1.0)
+        first = asyncio.ensure_future(driver.query(1, "S_CPOS"))
+        await asyncio.sleep(0)
+        reader.feed_data(reply(0x01, 0x36, 0x00, 0x00, 0x00, 0x00, 0x00))
+        assert await first == 0.0  # The S_CPOS key now exists, with no waiters
+        older = asyncio.ensure_future(driver.request(bytes(Read_Sys_Params(1, "S_VEL"))))
+        await asyncio.sleep(0)
+        newer = asyncio.ensure_future(driver.request(bytes(Read_Sys_Params(1, "S_CPOS"))))
+        await asyncio.sleep(0)
+        reader.feed_data(reply(0x01, 0x00, 0xEE))
+        frame = await older
+        assert frame.func == 0x00 and not newer.done()
+        reader.feed_data(reply(0x01, 0x36, 0x00, 0x00, 0x00, 0x00, 0x00))
+        assert (await newer).func == 0x36
+        await driver.close()
+    asyncio.run(main())
@@ -0,0 +1,50 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+from utils.kinematics import Arm
+
+DH = [(0, 90, 120, 0), (200, 0, 0, 90), (180, 0, 0, 0)]
+
+def arm(**kw):
+    return Arm(DH, addrs=[1, 2, 3], gear_ratios=[10, 20, 20], **kw)
+
+def test_ik_round_trips_through_fk():
+    a = arm()
+    q = a.ik([250.0, 0.0, 150.0])
+    assert q is not None
+    assert np.allclose(a.fk(q)[:3, 3], [250.0, 0.0, 150.0], atol=1e-2)
+    assert np.all(q > -180.0) and np.all(q <= 180.0)
+
+def test_ik_batch_solves_a_path_and_flags_unreachable():
+    a = arm()
+    path = np.array([[250.0, 0.0, 150.0], [220.0, 60.0, 180.0], [2000.0, 0.0, 0.0]])
+    qs, ok = a.ik_batch(path)
+    assert ok.tolist() == [True, True, False]
+    assert np.allclose(a.fk_batch(qs[:2])[:, :3, 3], path[:2], atol=1e-2)
+    assert a.ik([2000.0, 0.0, 0.0]) is None
+
+def test_ik_solves_full_poses():
+    a = arm()
+    pose = a.fk([20.0, -30.0, 60.0])
+    qs, ok = a.ik_batch(pose[None], seed=[15.0, -25.0, 55.0])  # Orientation pins the elbow branch
+    assert ok[0] and np.allclose(a.fk(qs[0]), pose, atol=1e-2)
+
+def test_cache_hits_and_explicit_seed_key():
+    a = arm()
+    q = a.ik([250.0, 0.0, 150.0])
+    assert np.array_equal(a.ik([250.0, 0.0, 150.0]), q)
+    assert (a.cache_hits, a.cache_misses) == (1, 1)
+    a.ik([250.0, 0.0, 150.0], seed=[0.0, 45.0, -90.0])
+    assert a.cache_misses == 2  # A different seed may land on another branch
+    a.clear_cache()
+    a.ik([250.0, 0.0, 150.0])
+    assert a.cache_misses == 3
+
+def test_wrap_stays_within_limits():
+    a = arm(limits=[(-90, 270), (-180, 180), (-180, 180)])
+    w = np.degrees(a._wrap(np.radians(np.array([[200.0, 190.0, -540.0]]))))[0]
+    assert np.allclose(w, [200.0, -170.0, 180.0])
+
+def test_moves_apply_gear_ratios():
+    a = arm()
+    assert a.moves([90.0, -45.0, 0.0], 300, 50) == [(1, 8000, 300, 50), (2, -8000, 300, 50), (3, 0, 300, 50)]
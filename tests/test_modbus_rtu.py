@@ -0,0 +1,60 @@
+import pytest
+
+from utils.stepperMotorControl import Pos_Control
+from utils.modbusRtu import (ModbusBackend, ModbusError, Crc16, Read_Registers_Into, REGISTERS,
+                             FC_READ_INPUT, FC_WRITE_MULTIPLE)
+
+from conftest import ScriptUart
+
+def seal(*data):  # Modbus frame with its CRC appended, low byte first
+    c = Crc16(bytes(data), 0, len(data))
+    return bytes(data) + bytes((c & 0xFF, c >> 8))
+
+CPOS = (0x00, 0x00, 0x01, 0x00, 0x00, 0x00)  # +1 rev, padded to three registers
+
+def test_crc_and_request_layout():
+    assert Crc16(b"123456789", 0, 9) == 0x4B37  # CRC-16/MODBUS check value
+    buf = bytearray(8)
+    assert Read_Registers_Into(buf, 1, 0, 1) == 8
+    assert bytes(buf) == bytes.fromhex("010400000001 31CA".replace(" ", ""))
+
+def test_query_decodes_like_the_native_reply(clock):
+    reg, count = REGISTERS["S_CPOS"]
+    uart = ScriptUart(lambda f: seal(f[0], FC_READ_INPUT, 2 * count, *CPOS))
+    assert ModbusBackend(uart, 5).query(2, "S_CPOS") == 360.0
+    assert uart.written == [seal(2, FC_READ_INPUT, 0, reg, 0, count)]
+
+@pytest.mark.parametrize("bad", ("addr", "fc", "count"))
+def test_reply_to_another_request_is_rejected(clock, bad):
+    count = REGISTERS["S_CPOS"][1]
+    addr, fc, n = 3 if bad == "addr" else 2, 0x03 if bad == "fc" else FC_READ_INPUT, 2 * count
+    data = CPOS
+    if bad == "count":
+        n, data = 2, CPOS[:2]
+    mb = ModbusBackend(ScriptUart(lambda f: seal(addr, fc, n, *data)), 5)
+    assert mb.query(2, "S_CPOS") is None and mb.bad_replies == 1
+
+def test_crc_error_and_garbled_length(clock):
+    reply = bytearray(seal(1, FC_READ_INPUT, 6, *CPOS))
+    reply[-1] ^= 0xFF
+    mb = ModbusBackend(ScriptUart(lambda f: bytes(reply)), 5)
+    assert mb.query(1, "S_CPOS") is None and mb.crc_errors == 1
+    mb = ModbusBackend(ScriptUart(lambda f: bytes((1, FC_READ_INPUT, 0xF0))), 5)
+    assert mb.query(1, "S_CPOS") is None and mb.bad_replies == 1
+
+def test_exception_reply_raises(clock):
+    mb = ModbusBackend(ScriptUart(lambda f: seal(1, FC_READ_INPUT | 0x80, 0x02)), 5)
+    with pytest.raises(ModbusError) as err:
+        mb.query(1, "S_CPOS")
+    assert (err.value.addr, err.value.fc, err.value.code) == (1, FC_READ_INPUT, 0x02)
+
+def test_send_writes_the_native_payload(clock):
+    cmd = bytes(Pos_Control(1, 0, 1000, 50, 3200, False, False))
+    uart = ScriptUart(lambda f: seal(*f[:6]))  # Echo of addr, fc, register and count
+    assert ModbusBackend(uart, 5).send(cmd)
+    frame = uart.written[0]
+    assert frame[:7] == bytes((1, FC_WRITE_MULTIPLE, 0x00, 0xFD, 0x00, 5, 10))
+    assert frame[7:17] == cmd[2:-1]  # Ten payload bytes, five registers
+    assert frame == seal(*frame[:-2])
+    uart = ScriptUart()
+    assert ModbusBackend(uart, 5).send(bytes(Pos_Control(0, 0, 1000, 50, 3200, False, False)))  # Broadcast: no reply
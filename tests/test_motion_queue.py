@@ -0,0 +1,36 @@
+from utils.motorSimulator import SimBus
+from utils.motionQueue import MotionQueue
+
+def program(addrs, n):
+    for i in range(1, n + 1):
+        yield [(a, 320 * i * (1 if a % 2 else -1), 600, 0) for a in addrs]  # A tenth of a turn further each move
+
+def test_put_pushes_back_when_the_window_is_full(clock):
+    q = MotionQueue(SimBus([1], clock=clock), lookahead=2)
+    moves = program([1], 3)
+    assert q.put(next(moves)) and q.put(next(moves))
+    assert q.full() and not q.put(next(moves))
+    q.step()  # Dispatching frees a slot
+    assert not q.full() and q.dispatched == 1
+
+def test_run_executes_every_move_in_order(clock):
+    bus = SimBus([1, 2], clock=clock)
+    q = MotionQueue(bus, lookahead=3)
+    assert q.run(program([1, 2], 8))
+    assert q.dispatched == q.completed == 8 and q.idle()
+    assert [bus.motors[a].target for a in (1, 2)] == [0.8, -0.8]
+    assert bus.motors[1].pos == 0.8
+
+def test_slot_grows_for_more_joints(clock):
+    addrs = list(range(1, 9))
+    bus = SimBus(addrs, clock=clock)
+    q = MotionQueue(bus, lookahead=2, max_joints=6)
+    assert q.run(program(addrs, 2))
+    assert [bus.motors[a].target for a in (7, 8)] == [0.2, -0.2]
+
+def test_stall_stops_the_queue(clock):
+    bus = SimBus([1, 2], clock=clock)
+    bus.motors[2].jammed = True
+    q = MotionQueue(bus, lookahead=2)
+    assert not q.run([[(1, 3200 * i, 600, 0), (2, 3200 * i, 600, 0)] for i in range(1, 5)])
+    assert q.fault == 2 and q.dispatched == 1 and q.completed == 0
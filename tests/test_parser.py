@@ -0,0 +1,66 @@
+from utils import stepperMotorControl as smc
+from utils.stepperMotorControl import RxRing, Extract_Frame, Frame_Length, Parse_Frame, Receive_Frame
+
+from conftest import reply, ScriptUart
+
+CPOS = reply(0x01, 0x36, 0x00, 0x00, 0x01, 0x00, 0x00)  # +1 rev = 360 degrees
+ACK = reply(0x02, 0xFD, 0x02)
+
+def ring_of(*chunks):
+    ring = RxRing()
+    for chunk in chunks:
+        ring.write(chunk)
+    return ring
+
+def frames(ring):
+    out = []
+    frame = Extract_Frame(ring, bytearray(64))
+    while frame is not None:
+        out.append((frame.addr, frame.func, frame.value))
+        frame = Extract_Frame(ring, bytearray(64))
+    return out
+
+def test_parse_position_and_ack():
+    frame = Parse_Frame(CPOS)
+    assert (frame.addr, frame.func, frame.value) == (1, 0x36, 360.0)
+    frame = Parse_Frame(ACK)
+    assert (frame.addr, frame.func, frame.value) == (2, 0xFD, smc.RESP_OK)
+
+def test_parse_rejects_bad_check_byte():
+    assert Parse_Frame(CPOS[:-1] + b"\x00") is None
+
+def test_frame_length_waits_for_length_byte():
+    assert Frame_Length(b"\x01", 0, 1) == 0
+    assert Frame_Length(b"\x01\x43", 0, 2) == 0
+    assert Frame_Length(CPOS, 0, len(CPOS)) == len(CPOS)
+
+def test_frame_length_flags_corrupt_length_byte():
+    assert Frame_Length(b"\x01\x43\x00", 0, 3) == -1
+    assert Frame_Length(b"\x01\x43\xff", 0, 3) == -1
+
+def test_extract_waits_for_split_frame():
+    ring = ring_of(CPOS[:4])
+    assert Extract_Frame(ring) is None
+    ring.write(CPOS[4:])
+    assert frames(ring) == [(1, 0x36, 360.0)]
+
+def test_extract_skips_noise_and_bad_frames():
+    bad = CPOS[:-1] + b"\x00"
+    ring = ring_of(b"\x00\x00", bad, ACK, CPOS)
+    assert frames(ring) == [(2, 0xFD, smc.RESP_OK), (1, 0x36, 360.0)]
+    assert ring.count == 0
+
+def test_extract_recovers_from_zero_length_byte():
+    # An S_State header with a length byte of 0 must not wedge the parser
+    ring = ring_of(b"\x01\x43\x00", CPOS)
+    assert frames(ring) == [(1, 0x36, 360.0)]
+    assert ring.count == 0
+
+def test_receive_frame_drops_stale_replies(clock):
+    uart = ScriptUart()
+    uart.feed(ACK + CPOS)
+    frame = Receive_Frame(uart, 0x36, 5, bytearray(64), RxRing())
+    assert (frame.addr, frame.func) == (1, 0x36)
+
+def test_receive_frame_times_out(clock):
+    assert Receive_Frame(ScriptUart(), 0x36, 5, bytearray(64), RxRing()) is None
@@ -0,0 +1,39 @@
+from utils import stepperMotorControl as smc
+from utils.stepperMotorControl import Read_State, SYS_PARAM_CODES
+from utils.motorSimulator import SimBus
+
+from conftest import reply, ScriptUart
+
+def fields_only(frame):  # Firmware without S_State: rejects it, answers the per-field reads
+    if frame[1] == 0x43:
+        return reply(frame[0], 0x00, 0xEE)
+    if frame[1] == SYS_PARAM_CODES["S_CPOS"]:
+        return reply(frame[0], 0x36, 0x00, 0x00, 0x00, 0x40, 0x00)  # 90 degrees
+    if frame[1] == SYS_PARAM_CODES["S_FLAG"]:
+        return reply(frame[0], 0x3A, 0x03)
+    return None  # Everything else goes unanswered
+
+def test_read_state_single_round_trip(clock):
+    bus = SimBus([1, 2], clock=clock)
+    state = Read_State(bus, 2, 20)
+    assert state.cpos == 0.0 and state.flags & smc.FLAG_ENABLED
+    assert bus.frames_in == 1
+
+def test_lost_reply_does_not_downgrade(clock):
+    uart = ScriptUart()  # Nothing answers
+    assert Read_State(uart, 1, 5) is None
+    assert 1 not in smc._noState
+    assert uart.written == [bytes(smc.Read_Sys_Params(1, "S_State"))]
+
+def test_rejection_falls_back_to_field_reads(clock):
+    uart = ScriptUart(fields_only)
+    state = Read_State(uart, 3, 5)
+    assert 3 in smc._noState
+    assert state.cpos == 90.0 and state.flags == 0x03 and state.vel is None
+    uart.written = []
+    Read_State(uart, 3, 5)
+    assert uart.written[0] == bytes(smc.Read_Sys_Params(3, "S_CPOS"))  # S_State is not retried
+
+def test_unreachable_motor_returns_none_after_fallback(clock):
+    smc._noState.add(5)
+    assert Read_State(ScriptUart(), 5, 5) is None
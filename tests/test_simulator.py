@@ -0,0 +1,49 @@
+from utils.stepperMotorControl import Read_Sys_Params, Query, Sync_Move
+from utils.motorSimulator import SimBus
+from utils.correlator import Correlator
+from utils.telemetryPoller import PollScheduler
+from utils.busStats import BusStats
+
+PARAMS = ("S_CPOS", "S_VEL", "S_FLAG")
+
+def test_overlapping_replies_collide(clock):
+    bus = SimBus([1, 2], clock=clock)
+    bus.write(bytes(Read_Sys_Params(1, "S_CPOS")) + bytes(Read_Sys_Params(2, "S_CPOS")))
+    assert bus.collisions == 1
+    clock.sleep(0.005)
+    bus.read()  # Let the garbled replies drain
+    assert Query(bus, 1, "S_CPOS", 20) == 0.0  # The line recovers once it is quiet
+
+def test_one_driver_answers_back_to_back(clock):
+    bus = SimBus([1], clock=clock)
+    bus.write(b"".join(bytes(Read_Sys_Params(1, s)) for s in PARAMS))
+    assert bus.collisions == 0
+
+def test_default_sweep_and_poller_never_collide(clock):
+    bus = SimBus(range(1, 7), clock=clock)
+    values = Correlator(bus).sweep(range(1, 7), PARAMS)
+    assert all(None not in v for v in values.values())
+    poller = PollScheduler(bus, range(1, 7), PARAMS)
+    for _ in range(5):
+        poller.poll_once()
+    assert poller.dropped == 0 and bus.collisions == 0
+
+def test_stats_count_every_frame_of_a_write():
+    stats = BusStats()
+    burst = bytes(Read_Sys_Params(1, "S_CPOS")) + bytes(Read_Sys_Params(2, "S_State"))
+    stats.sent(burst, len(burst))
+    assert stats.tx_frames == 2
+    assert sorted(stats._sent) == [0x136, 0x243]
+
+def test_sync_move_reaches_every_motor(clock):
+    bus = SimBus([1, 2, 3], clock=clock)
+    Sync_Move(bus, [(a, 3200 * a, 600, 0) for a in (1, 2, 3)])
+    assert [bus.motors[a].target for a in (1, 2, 3)] == [1.0, 2.0, 3.0]
+
+def test_target_position_is_the_move_target(clock):
+    bus = SimBus([1], clock=clock)
+    Sync_Move(bus, [(1, 32000, 600, 0)])  # Ten revolutions
+    clock.sleep(0.05)
+    assert Query(bus, 1, "S_TPOS", 20) == 3600.0
+    assert 0.0 < Query(bus, 1, "S_CPOS", 20) < 3600.0
+    assert abs(Query(bus, 1, "S_PERR", 20)) < 1.0  # Following error, not the distance to go
@@ -0,0 +1,22 @@
+from utils.stepperMotorControl import Telemetry, Real_time_location
+from utils.motorSimulator import SimBus
+
+def test_real_time_location(clock):
+    bus = SimBus([1], clock=clock)
+    bus.motors[1].pos = 0.5
+    assert Real_time_location(bus, 1) == 180.0
+
+def test_telemetry_request_does_not_block(clock):
+    bus = SimBus([1, 2], clock=clock)
+    bus.motors[2].pos = -0.5
+    tm = Telemetry(bus, timeout_ms=20)
+    got = []
+    tm.request(2, "S_CPOS", lambda addr, value: got.append((addr, value)))
+    assert tm.busy and not got  # Nothing is read until poll()
+    while not tm.poll():
+        pass
+    assert got == [(2, -180.0)] and not tm.busy
+
+def test_telemetry_times_out(clock):
+    tm = Telemetry(SimBus([1], clock=clock), timeout_ms=5)
+    assert tm.read(7) is None
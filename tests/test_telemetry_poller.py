@@ -0,0 +1,21 @@
+from utils import stepperMotorControl as smc
+from utils.motorSimulator import SimBus
+from utils.telemetryPoller import PollScheduler
+from utils.busStats import BusStats
+
+def test_snapshot_holds_every_value(clock):
+    bus = SimBus([1, 2], clock=clock)
+    bus.motors[2].pos = bus.motors[2].target = 1.0
+    snap = PollScheduler(bus, [1, 2], ("S_CPOS", "S_FLAG")).poll_once()
+    assert snap.seq == 1 and snap.values == [[0.0, 3], [360.0, 3]]
+
+def test_drops_reach_bus_stats_per_function(clock):
+    stats = BusStats()
+    smc.Attach_Stats(stats)
+    try:
+        poller = PollScheduler(SimBus([1], clock=clock), [1, 9], ("S_CPOS", "S_VEL"))  # No motor 9
+        snap = poller.poll_once()
+    finally:
+        smc.Attach_Stats(None)
+    assert snap.values[1] == [None, None] and poller.dropped == 2
+    assert stats.timeouts_by_func == {0x36: 1, 0x35: 1}
@@ -0,0 +1,45 @@
+import pytest
+
+from utils.trajectoryPlanner import TrajectoryPlanner, Acc_Code, Play, TRAPEZOID, S_CURVE
+from utils.motorSimulator import SimBus
+
+WAYPOINTS = [[0, 0, 0], [90, -45, 180], [0, 0, 0]]
+
+@pytest.mark.parametrize("shape", (TRAPEZOID, S_CURVE))
+def test_profile_is_continuous_and_symmetric(shape):
+    planner = TrajectoryPlanner([1, 2, 3], max_rpm=600, max_acc=2000, shape=shape)
+    seg = planner.plan(WAYPOINTS)[0]
+    ts = [seg.duration * i / 200.0 for i in range(201)]
+    s = [seg.progress(t) for t in ts]
+    assert s[0] == 0.0 and s[-1] == 1.0
+    assert all(b >= a for a, b in zip(s, s[1:]))  # Never backs up
+    assert abs(seg.progress(seg.ta) - seg.progress(seg.ta - 1e-9)) < 1e-6
+    assert abs(seg.progress(seg.duration * 0.5) - 0.5) < 1e-9
+    assert seg.position(seg.duration) == [90, -45, 180]
+
+def test_segments_are_back_to_back_within_limits():
+    planner = TrajectoryPlanner([1, 2, 3], max_rpm=[600, 600, 100], max_acc=2000)
+    segments = planner.plan(WAYPOINTS)
+    assert len(segments) == 2
+    assert segments[1].t0 == segments[0].duration
+    seg = segments[0]
+    cruise_rpm = 180.0 / (seg.duration - seg.ta) / 6.0
+    assert cruise_rpm <= 100.0 + 1e-6  # The slowest joint sets the pace
+
+def test_acc_code_range():
+    assert Acc_Code(0) == 0
+    assert Acc_Code(1e9) == 255
+    assert Acc_Code(1) == 1
+    assert 200 < Acc_Code(1000) < 256
+
+@pytest.mark.parametrize("stream", (False, True))
+def test_played_frames_end_on_the_last_waypoint(clock, stream):
+    bus = SimBus([1, 2, 3], clock=clock)
+    planner = TrajectoryPlanner([1, 2, 3], max_rpm=600, max_acc=2000)
+    segments = planner.plan(WAYPOINTS[:2])
+    frames = planner.frames_stream(segments, 10) if stream else planner.frames_segments(segments)
+    times = [t for t, _ in frames]
+    assert times == sorted(times) and times[0] == 0
+    Play(bus, frames)
+    bus.read()
+    assert [bus.motors[a].target * 360.0 for a in (1, 2, 3)] == [90.0, -45.0, 180.0]
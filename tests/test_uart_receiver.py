@@ -0,0 +1,58 @@
+import asyncio
+
+from utils.stepperMotorControl import RxRing
+from utils.uartReceiver import IrqReceiver, StreamReceiver, _frame_ready
+
+from conftest import reply, ScriptUart
+
+CPOS = reply(0x01, 0x36, 0x00, 0x00, 0x01, 0x00, 0x00)  # +1 rev = 360 degrees
+ACK = reply(0x02, 0xFD, 0x02)
+
+class IrqUart(ScriptUart):  # ScriptUart with the machine.UART irq() hook
+    def irq(self, handler=None, trigger=0):
+        self.handler_irq = handler
+
+def ring_of(data):
+    ring = RxRing()
+    ring.write(data)
+    return ring
+
+def test_frame_ready():
+    assert not _frame_ready(RxRing())
+    assert not _frame_ready(ring_of(CPOS[:4]))
+    assert _frame_ready(ring_of(CPOS))
+    assert _frame_ready(ring_of(b"\x00"))  # Noise is handed to Extract_Frame to drop
+    assert _frame_ready(ring_of(b"\x01\x43\x00"))  # So is a corrupt length byte
+
+def test_irq_receiver_signals_and_filters():
+    uart = IrqUart()
+    rx = IrqReceiver(uart, trigger=1)
+    uart.feed(CPOS[:4])
+    uart.handler_irq(uart)
+    assert not rx.flag.is_set() and rx.get() is None
+    uart.feed(CPOS[4:] + ACK + reply(0x01, 0x00, 0xEE))
+    uart.handler_irq(uart)
+    assert rx.flag.is_set() and rx.irqs == 2
+    frame = rx.get(0xFD, addr=1)  # Drops the S_CPOS reply and motor 2's ack, keeps the error frame
+    assert (frame.addr, frame.func) == (1, 0x00)
+    assert rx.get() is None
+
+def test_irq_receiver_callback_decodes_in_the_handler():
+    uart = IrqUart()
+    got = []
+    IrqReceiver(uart, trigger=1, callback=lambda f: got.append((f.addr, f.func, f.value)))
+    uart.feed(ACK + CPOS)
+    uart.handler_irq(uart)
+    assert got == [(2, 0xFD, 0x02), (1, 0x36, 360.0)]
+
+def test_stream_receiver_recovers_from_corrupt_length():
+    async def main():
+        reader = asyncio.StreamReader()
+        rx = StreamReceiver(reader, size=16)
+        reader.feed_data(b"\x01\x43\x00" + CPOS)
+        frame = await rx.frame(0x36, 100)
+        first = (frame.addr, frame.func, frame.value)
+        missing = await rx.frame(0x36, 10)
+        return first, missing
+    first, missing = asyncio.run(main())
+    assert first == (1, 0x36, 360.0) and missing is None
@@ -0,0 +1,143 @@
+"""
+uasyncio Motor Controller for the Open-APEX Project
+---------------------------------
+Lets independent on-device tasks (arm motion, exchangeable tool, watchdog)
+share one motor bus without blocking each other. A single bus-owner task
+runs one transaction at a time: write the frame, await the reply from the
+interrupt-driven receiver, wake the requesting task. Every other task only
+queues requests and awaits them, so waiting for a reply yields to the rest
+of the program instead of spinning in Receive_Data.
+
+    ctl = MotorController(uart)
+    asyncio.create_task(arm_task(ctl))         # await ctl.sync_move([...]) / await ctl.query(1, "S_CPOS")
+    asyncio.create_task(tool_task(ctl))        # await ctl.send(Vel_Control(7, 0, 300, 10, False))
+    asyncio.create_task(watchdog(ctl))         # await ctl.stop(addr), jumps the queue
+
+Requests are served in order except urgent ones (stop() and send(...,
+urgent=True)), which go to the front of the queue. A reply must match the
+request's address and function code; sync_move() completes only once every
+joint has acked, so no late ack is left for a later request to mistake for
+its own.
+"""
+
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+
+from utils.stepperMotorControl import (Read_Sys_Params, Stop_Now, Sync_Move_Into, Sync_Move_Length, Sync_Move_Buffer,
+                                       SYS_PARAM_CODES, STATE_FIELDS, State_Reply, Assemble_State)
+from utils.uartReceiver import IrqReceiver, StreamReceiver
+
+class _Request:
+    __slots__ = ("cmd", "addr", "func", "acks", "timeout_ms", "done", "frame")
+
+    def __init__(self, cmd, func, timeout_ms, acks=None):
+        self.cmd = cmd
+        self.addr = cmd[0]  # Only replies from this motor count
+        self.func = func  # Function code of the expected reply, None for broadcasts
+        self.acks = acks  # Joint addresses of a multi-frame command, each acked with func
+        self.timeout_ms = timeout_ms
+        self.done = asyncio.Event()
+        self.frame = None  # Reply, None on timeout or broadcast
+
+class MotorController:
+    def __init__(self, uart, receiver=None, timeout_ms=100):
+        self.uart = uart
+        if receiver is None:
+            receiver = IrqReceiver(uart) if hasattr(uart, "irq") else StreamReceiver(asyncio.StreamReader(uart))
+        self.rx = receiver
+        self.timeout_ms = timeout_ms  # Default per-request reply timeout
+        self._queue = []
+        self._wake = asyncio.Event()
+        self._syncBuf = bytearray(Sync_Move_Length(8))
+        self._noState = set()  # Addresses whose firmware rejected S_State
+        self.timeouts = 0
+        self.transactions = 0
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self):  # Bus owner: the only coroutine that touches the UART
+        queue = self._queue
+        while True:
+            while not queue:
+                await self._wake.wait()
+                self._wake.clear()
+            req = queue.pop(0)
+            self.rx.clear()  # Drop late replies to earlier requests and unread sync acks
+            self.uart.write(req.cmd)
+            if req.acks:
+                await self._collect_acks(req)
+            elif req.func is not None:
+                req.frame = await self.rx.frame(req.func, req.timeout_ms, req.addr)
+                if req.frame is None:
+                    self.timeouts += 1
+            self.transactions += 1
+            req.done.set()
+
+    async def _collect_acks(self, req):  # Wait until every joint of a multi-frame command has acked
+        waiting = list(req.acks)
+        while waiting:
+            frame = await self.rx.frame(req.func, req.timeout_ms)
+            if frame is None:
+                self.timeouts += 1
+                return
+            if frame.addr in waiting:
+                waiting.remove(frame.addr)
+
+    async def request(self, cmd, func=None, timeout_ms=None, urgent=False, reply=True, acks=None):  # Queue a frame, await its reply Frame
+        # func defaults to the command's own function code (acks echo it);
+        # broadcasts (addr 0) and reply=False return None once written. With
+        # acks (the joint addresses of a multi-frame cmd such as Sync_Move),
+        # the request completes once each joint acked, and returns None.
+        if not reply or (cmd[0] == 0 and not acks):
+            func = None
+        elif func is None:
+            func = cmd[1]
+        req = _Request(cmd, func, self.timeout_ms if timeout_ms is None else timeout_ms, acks)
+        if urgent:
+            self._queue.insert(0, req)
+        else:
+            self._queue.append(req)
+        self._wake.set()
+        await req.done.wait()
+        return req.frame
+
+    async def send(self, cmd, timeout_ms=None, urgent=False):  # Control command, returns the ack status byte (RESP_OK, ...)
+        frame = await self.request(cmd, None, timeout_ms, urgent)
+        return None if frame is None else frame.value
+
+    async def query(self, addr, s, timeout_ms=None):  # Read_Sys_Params reply decoded, None on timeout or error
+        func = SYS_PARAM_CODES[s]
+        frame = await self.request(Read_Sys_Params(addr, s), func, timeout_ms)
+        if frame is None or frame.func != func:
+            return None  # func 0x00 is a format error reply
+        return frame.value
+
+    async def read_state(self, addr, timeout_ms=None):  # Like Read_State: S_State in one round trip, per-field fallback
+        if addr not in self._noState:
+            frame = await self.request(Read_Sys_Params(addr, "S_State"), SYS_PARAM_CODES["S_State"], timeout_ms)
+            state = State_Reply(frame)
+            if state is not False:
+                return state
+            self._noState.add(addr)
+        values = []
+        for field, s in STATE_FIELDS:
+            value = await self.query(addr, s, timeout_ms)
+            if value is None and not values:
+                return None
+            values.append(value)
+        return Assemble_State(values)
+
+    async def stop(self, addr, snF=False):  # Stop_Now ahead of everything queued
+        return await self.send(Stop_Now(addr, snF), urgent=True)
+
+    async def sync_move(self, moves, raF=True, sync_addr=0):  # Sync_Move as one bus transaction
+        self._syncBuf = Sync_Move_Buffer(self._syncBuf, len(moves))  # Grows once for longer moves
+        n = Sync_Move_Into(self._syncBuf, 0, moves, raF, sync_addr)
+        await self.request(bytes(self._syncBuf[:n]), acks=[m[0] for m in moves])  # Done once every joint acked
+        return n
+
+    def close(self):  # Stop the bus-owner task, pending requests are abandoned
+        self._task.cancel()
+        if hasattr(self.rx, "close"):
+            self.rx.close()
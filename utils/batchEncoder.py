@@ -0,0 +1,67 @@
+"""
+Vectorized Frame Encoder for the Open-APEX Project (host only, needs NumPy)
+---------------------------------
+Encodes thousands of Pos_Control frames in one vectorized pass instead of
+calling the scalar builders per sample. Parameters are NumPy arrays (or
+scalars, broadcast against each other); the result is one packed uint8
+array of 13-byte frames, byte-identical to concatenated Pos_Control output.
+
+    frames = Pos_Control_Batch(addr, dir, vel, acc, clk, raF=True, snF=False)
+    block = Setpoint_Stream(pulses, [1, 2, 3], dt=0.01)   # one row per tick
+    for row in block:
+        uart.write(row)
+"""
+
+import numpy as np
+from utils import stepperMotorControl as smc
+
+POS_FRAME_LEN = 13
+
+def Seal_Batch(frames):  # Fill the last column of (N, L) frames with the check byte for the current checksum mode
+    mode = smc.checksum_mode
+    if mode == smc.CHECK_XOR:
+        frames[:, -1] = np.bitwise_xor.reduce(frames[:, :-1], axis=1)
+    elif mode == smc.CHECK_CRC8:
+        table = np.frombuffer(smc.CRC8_TABLE, dtype=np.uint8)
+        c = np.zeros(frames.shape[0], dtype=np.uint8)
+        for k in range(frames.shape[1] - 1):
+            c = table[c ^ frames[:, k]]
+        frames[:, -1] = c
+    else:
+        frames[:, -1] = 0x6B
+    return frames
+
+def Pos_Control_Batch(addr, dir, vel, acc, clk, raF, snF):  # Packed uint8 array of len(...) * 13 bytes
+    addr, dir, vel, acc, clk, raF, snF = np.broadcast_arrays(
+        *[np.atleast_1d(np.asarray(a)) for a in (addr, dir, vel, acc, clk, raF, snF)])
+    n = addr.size
+    vel = vel.ravel().astype(np.uint32)
+    out = np.empty((n, POS_FRAME_LEN), dtype=np.uint8)
+    out[:, 0] = addr.ravel()  # Address
+    out[:, 1] = 0xFD  # Function code
+    out[:, 2] = dir.ravel()  # Direction
+    out[:, 3] = (vel >> 8) & 0xFF  # Speed high byte (RPM)
+    out[:, 4] = vel & 0xFF  # Speed low byte (RPM)
+    out[:, 5] = acc.ravel()  # Acceleration
+    out[:, 6:10] = clk.ravel().astype(">u4").view(np.uint8).reshape(n, 4)  # Pulse count, big-endian
+    out[:, 10] = raF.ravel() != 0  # Relative/absolute flag
+    out[:, 11] = snF.ravel() != 0  # Multi-motor sync flag
+    Seal_Batch(out)  # Check byte
+    return out.reshape(-1)
+
+def Setpoint_Stream(pulses, addrs, dt, pulses_per_rev=3200, acc=0):  # Per-tick Sync_Move blocks for sampled setpoints
+    # pulses: (ticks, joints) absolute positions. Row k of the result is the
+    # snF-flagged Pos_Control frame for every joint plus the broadcast trigger,
+    # with each joint's RPM sized to cover its step within dt seconds.
+    pulses = np.asarray(pulses, dtype=np.int64)
+    ticks, joints = pulses.shape
+    step = np.abs(np.diff(pulses, axis=0, prepend=pulses[:1]))
+    rpm = np.clip(np.ceil(step * 60.0 / (pulses_per_rev * dt)), 1, 0xFFFF)
+    frames = Pos_Control_Batch(
+        np.broadcast_to(np.asarray(addrs, dtype=np.uint8), (ticks, joints)),
+        (pulses < 0).astype(np.uint8), rpm, acc, np.abs(pulses), True, True)
+    sync = np.frombuffer(bytes(smc.Synchronous_motion(0)), dtype=np.uint8)  # Broadcast trigger
+    block = np.empty((ticks, joints * POS_FRAME_LEN + len(sync)), dtype=np.uint8)
+    block[:, :joints * POS_FRAME_LEN] = frames.reshape(ticks, -1)
+    block[:, joints * POS_FRAME_LEN:] = sync
+    return block
@@ -0,0 +1,182 @@
+"""
+Multi-Bus Manager for the Open-APEX Project
+---------------------------------
+Splits the joints across several UARTs (or host serial ports) so telemetry
+and commands for different motors travel in parallel instead of queueing on
+one 115200-baud line. Motor addresses are routed to their bus; builder
+output is written to the bus that owns its address, broadcasts go to all.
+
+    buses = BusManager({1: uart1, 2: uart1, 3: uart1, 4: uart2, 5: uart2, 6: uart2})
+    buses.send(Pos_Control(4, 0, 1000, 50, 3200, False, False))     # goes to uart2
+    buses.sync_move([(1, 3200, 600, 50), (4, -3200, 600, 50)])       # one start across both buses
+    positions = buses.query_all("S_CPOS")                           # {addr: degrees}, buses in parallel
+
+query_all() keeps one non-blocking Telemetry request in flight per bus and
+services them from a single loop, so a sweep takes as long as the busiest
+bus rather than the sum of all buses (threads would not help here: the
+UART interface is polled, and polling threads serialize on the host's
+GIL). parallel(job) runs a blocking job(bus) per bus in threads on the
+host and one bus after the other elsewhere; each Bus carries its own
+receive buffers for that, e.g. job = lambda bus: [bus.query(a, "S_CPOS")
+for a in bus.addrs]. On-device under uasyncio use
+AsyncBusManager, which puts one MotorController (one bus-owner task) on
+each UART.
+
+Synchronized moves load every joint with the snF flag first and then send
+Synchronous_motion to all buses back to back, so the start skew between
+buses is one 4-byte trigger write rather than a whole move.
+"""
+
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+
+try:
+    from concurrent.futures import ThreadPoolExecutor
+except ImportError:
+    ThreadPoolExecutor = None  # MicroPython: sequential per-bus I/O, or use AsyncBusManager
+
+from utils.stepperMotorControl import Sync_Move_Into, Sync_Move_Length, Sync_Move_Buffer, Query, Receive_Frame, Telemetry
+
+class Bus:  # One UART with its own buffers, so buses can be served from different threads
+    def __init__(self, uart):
+        self.uart = uart
+        self.addrs = []
+        self.tm = Telemetry(uart)  # Owns the bus's receive ring and frame buffers
+        self.sync = bytearray(Sync_Move_Length(8))
+
+    def query(self, addr, s, timeout_ms=100):  # Query() on this bus's own buffers
+        tm = self.tm
+        return Query(self.uart, addr, s, timeout_ms, tm.buf, tm.ring, tm.tx)
+
+    def request(self, cmd, timeout_ms=100):  # Write a command and wait for its ack frame
+        tm = self.tm
+        tm.ring.clear()
+        self.uart.write(cmd)
+        return Receive_Frame(self.uart, cmd[1], timeout_ms, tm.buf, tm.ring)
+
+class BusManager:
+    def __init__(self, routes, timeout_ms=100, threads=True):
+        self.timeout_ms = timeout_ms
+        self.route = {}  # addr -> Bus
+        self.buses = []
+        byUart = {}
+        for addr, uart in routes.items():
+            bus = byUart.get(id(uart))
+            if bus is None:
+                bus = byUart[id(uart)] = Bus(uart)
+                self.buses.append(bus)
+            bus.addrs.append(addr)
+            self.route[addr] = bus
+        self._pool = None
+        if threads and ThreadPoolExecutor is not None and len(self.buses) > 1:
+            self._pool = ThreadPoolExecutor(max_workers=len(self.buses))
+
+    def uart(self, addr):  # UART that carries motor addr
+        return self.route[addr].uart
+
+    def parallel(self, job):  # Run job(bus) for every Bus, in threads where available, results in bus order
+        # Jobs must receive through bus.query()/bus.request() (or the bus.tm
+        # buffers): the module-level Query() defaults share one ring between
+        # all threads.
+        if self._pool is None:
+            return [job(bus) for bus in self.buses]
+        return list(self._pool.map(job, self.buses))
+
+    def send(self, cmd):  # Write a builder's frame to the bus owning its address, broadcasts to every bus
+        if cmd[0] == 0:
+            for bus in self.buses:
+                bus.uart.write(cmd)
+        else:
+            self.route[cmd[0]].uart.write(cmd)
+
+    def request(self, cmd, timeout_ms=None):  # Send a command and return its ack status byte, None on timeout
+        frame = self.route[cmd[0]].request(cmd, self.timeout_ms if timeout_ms is None else timeout_ms)
+        return None if frame is None else frame.value
+
+    def query(self, addr, s, timeout_ms=None):
+        return self.route[addr].query(addr, s, self.timeout_ms if timeout_ms is None else timeout_ms)
+
+    def query_all(self, s, addrs=None, timeout_ms=None):  # {addr: decoded value or None}, one query in flight per bus
+        timeout_ms = self.timeout_ms if timeout_ms is None else timeout_ms
+        values = {}
+        active = []
+        for bus in self.buses:
+            todo = [a for a in bus.addrs if addrs is None or a in addrs]
+            if todo:
+                bus.tm.timeout_ms = timeout_ms
+                bus.tm.request(todo.pop(0), s)
+                active.append((bus.tm, todo))
+        while active:
+            for item in active:
+                tm, todo = item
+                if tm.poll():
+                    values[tm.addr] = tm.value
+                    if todo:
+                        tm.request(todo.pop(0), s)
+                    else:
+                        active.remove(item)
+                        break  # List changed, restart the sweep
+        return values
+
+    def sync_move(self, moves, raF=True):  # Load every bus with snF moves, then trigger all buses back to back
+        groups = {}
+        for m in moves:
+            groups.setdefault(id(self.route[m[0]]), []).append(m)
+        loaded = []
+        for bus in self.buses:
+            group = groups.get(id(bus))
+            if group:
+                bus.sync = Sync_Move_Buffer(bus.sync, len(group))  # Grows once for longer moves
+                n = Sync_Move_Into(bus.sync, 0, group, raF, 0)
+                bus.uart.write(memoryview(bus.sync)[:n - 4])  # Joint frames, held until the trigger
+                loaded.append((bus, n))
+        for bus, n in loaded:
+            bus.uart.write(memoryview(bus.sync)[n - 4:n])  # Synchronous_motion broadcast
+        return len(loaded)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+class AsyncBusManager:
+    def __init__(self, controllers):  # {addr: MotorController}, one controller per UART
+        self.route = dict(controllers)
+        self.controllers = []
+        for ctl in self.route.values():
+            if ctl not in self.controllers:
+                self.controllers.append(ctl)
+
+    def controller(self, addr):
+        return self.route[addr]
+
+    async def send(self, cmd):  # Ack status byte; broadcasts go to every bus and return None
+        if cmd[0] == 0:
+            await asyncio.gather(*[ctl.request(cmd) for ctl in self.controllers])
+            return None
+        return await self.route[cmd[0]].send(cmd)
+
+    async def query(self, addr, s, timeout_ms=None):
+        return await self.route[addr].query(addr, s, timeout_ms)
+
+    async def query_all(self, s, addrs=None, timeout_ms=None):  # {addr: value}, queries on different buses overlap
+        addrs = list(self.route) if addrs is None else list(addrs)
+        values = await asyncio.gather(*[self.route[a].query(a, s, timeout_ms) for a in addrs])
+        return dict(zip(addrs, values))
+
+    async def sync_move(self, moves, raF=True):  # Load every bus with snF moves, then trigger all buses
+        groups = {}
+        for m in moves:
+            groups.setdefault(id(self.route[m[0]]), []).append(m)
+        loaded = [ctl for ctl in self.controllers if id(ctl) in groups]
+        frames = []
+        for ctl in loaded:
+            buf = bytearray(Sync_Move_Length(len(groups[id(ctl)])))
+            Sync_Move_Into(buf, 0, groups[id(ctl)], raF, 0)
+            frames.append(buf)
+        await asyncio.gather(*[ctl.request(bytes(buf[:-4]), acks=[m[0] for m in groups[id(ctl)]])  # Loaded once every joint acked
+                               for ctl, buf in zip(loaded, frames)])
+        await asyncio.gather(*[ctl.request(bytes(buf[-4:]), reply=False) for ctl, buf in zip(loaded, frames)])
+        return len(loaded)
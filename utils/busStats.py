@@ -0,0 +1,174 @@
+"""
+Bus Utilization Statistics for the Open-APEX Project
+---------------------------------
+Measures how close a motor bus is to saturation so baud rate and polling
+rates can be sized from data. StatsUart wraps a UART and counts the bytes
+and frames in each direction, stamping every request it writes; the receive
+path (Extract_Frame, Receive_Frame, Telemetry, PollScheduler) reports
+matched replies, timeouts and check-byte failures through Attach_Stats.
+
+    stats = BusStats(baudrate=115200)
+    uart = StatsUart(uart, stats)           # use the wrapped UART everywhere
+    Attach_Stats(stats)
+    ...
+    print(stats.report())                   # periodic one-line dump
+    stats.rtt[0x36]                         # S_CPOS round-trip histogram
+    stats.reset()                           # start the next measurement window
+
+Round-trip latency is measured per function code from the write of a
+request to the arrival of the reply with the same address and function
+code, and binned into RTT_BOUNDS_US. Multi-frame writes (Sync_Move, query
+bursts) are split by command length, so every frame is counted and every
+request in a burst is stamped. Counters are plain attributes, so reading
+them costs nothing and updating them costs one increment.
+"""
+
+from utils.stepperMotorControl import Command_Length, ticks_ms, ticks_us, ticks_diff
+
+RTT_BOUNDS_US = (200, 500, 1000, 2000, 5000, 10000, 20000, 50000)  # Bucket upper bounds, last bucket is open-ended
+
+class Histogram:  # Round-trip latencies for one function code
+    __slots__ = ("counts", "n", "total_us", "max_us")
+
+    def __init__(self):
+        self.counts = [0] * (len(RTT_BOUNDS_US) + 1)
+        self.n = 0
+        self.total_us = 0
+        self.max_us = 0
+
+    def add(self, us):
+        k = 0
+        for bound in RTT_BOUNDS_US:
+            if us <= bound:
+                break
+            k += 1
+        self.counts[k] += 1
+        self.n += 1
+        self.total_us += us
+        if us > self.max_us:
+            self.max_us = us
+
+    def mean_us(self):
+        return self.total_us / self.n if self.n else 0.0
+
+    def percentile_us(self, p):  # Upper bound of the bucket holding the p-th percentile (0-100)
+        if not self.n:
+            return 0
+        rank = self.n * p / 100.0
+        seen = 0
+        for k, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank:
+                return RTT_BOUNDS_US[k] if k < len(RTT_BOUNDS_US) else self.max_us
+        return self.max_us
+
+class BusStats:
+    def __init__(self, baudrate=115200):
+        self.baudrate = baudrate  # For utilization: 10 bits per byte on the wire (8N1)
+        self._sent = {}  # addr << 8 | func -> ticks_us() of the last request written
+        self.reset()
+
+    def reset(self):  # Zero all counters and start a new window
+        self.tx_bytes = 0
+        self.rx_bytes = 0
+        self.tx_frames = 0
+        self.rx_frames = 0
+        self.timeouts = 0
+        self.check_errors = 0
+        self.unmatched = 0  # Replies without a stamped request (late, duplicate or unsolicited)
+        self.rtt = {}  # func -> Histogram
+        self.timeouts_by_func = {}
+        self._sent.clear()
+        self.sTime = ticks_ms()
+
+    def sent(self, buf, n):  # Called by StatsUart for every write, one count and stamp per frame in it
+        self.tx_bytes += n
+        now = ticks_us()
+        i = 0
+        while i < n:
+            m = Command_Length(buf, i, n)
+            if m == 0 or i + m > n:  # Truncated tail counts as one frame
+                m = n - i
+            self.tx_frames += 1
+            if m >= 3 and buf[i] != 0:  # Broadcasts get no reply
+                self._sent[(buf[i] << 8) | buf[i + 1]] = now
+            i += m
+
+    def received(self, frame):  # Called from Extract_Frame for every valid reply
+        self.rx_frames += 1
+        t = self._sent.pop((frame.addr << 8) | frame.func, None)
+        if t is None:
+            self.unmatched += 1
+            return
+        h = self.rtt.get(frame.func)
+        if h is None:
+            h = self.rtt[frame.func] = Histogram()
+        h.add(ticks_diff(ticks_us(), t))
+
+    def timed_out(self, func):
+        self.timeouts += 1
+        if func is not None:
+            self.timeouts_by_func[func] = self.timeouts_by_func.get(func, 0) + 1
+
+    def elapsed_s(self):
+        return max(ticks_diff(ticks_ms(), self.sTime), 1) / 1000.0
+
+    def utilization(self):  # Fraction of the line's capacity used in both directions (half-duplex bus)
+        return (self.tx_bytes + self.rx_bytes) * 10 / (self.baudrate * self.elapsed_s())
+
+    def as_dict(self):  # Everything in plain types, for logging or JSON
+        dt = self.elapsed_s()
+        rtt = {}
+        for func, h in self.rtt.items():
+            rtt["0x{:02X}".format(func)] = {"n": h.n, "mean_us": h.mean_us(), "p95_us": h.percentile_us(95),
+                                             "max_us": h.max_us, "counts": list(h.counts)}
+        return {
+            "elapsed_s": dt,
+            "tx_bytes": self.tx_bytes,
+            "rx_bytes": self.rx_bytes,
+            "tx_fps": self.tx_frames / dt,
+            "rx_fps": self.rx_frames / dt,
+            "utilization": self.utilization(),
+            "timeouts": self.timeouts,
+            "check_errors": self.check_errors,
+            "unmatched": self.unmatched,
+            "rtt": rtt,
+        }
+
+    def report(self):  # One-line status for periodic logging
+        dt = self.elapsed_s()
+        line = "tx={}B rx={}B fps={:.0f}/{:.0f} util={:.1f}% timeouts={} check_errors={}".format(
+            self.tx_bytes, self.rx_bytes, self.tx_frames / dt, self.rx_frames / dt, self.utilization() * 100,
+            self.timeouts, self.check_errors)
+        for func in sorted(self.rtt):
+            h = self.rtt[func]
+            line += " rtt[0x{:02X}]={:.0f}/{}us".format(func, h.mean_us(), h.percentile_us(95))
+        return line
+
+class StatsUart:  # UART wrapper counting traffic into a BusStats
+    def __init__(self, uart, stats):
+        self.uart = uart
+        self.stats = stats
+
+    def write(self, buf):
+        n = self.uart.write(buf)
+        self.stats.sent(buf, len(buf) if n is None else n)
+        return n
+
+    def any(self):
+        return self.uart.any()
+
+    def readinto(self, buf, n=None):
+        got = self.uart.readinto(buf) if n is None else self.uart.readinto(buf, n)
+        if got:
+            self.stats.rx_bytes += got
+        return got
+
+    def read(self, n=None):
+        data = self.uart.read() if n is None else self.uart.read(n)
+        if data:
+            self.stats.rx_bytes += len(data)
+        return data
+
+    def __getattr__(self, name):  # irq, init, deinit, ... pass straight through
+        return getattr(self.uart, name)
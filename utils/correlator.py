@@ -0,0 +1,227 @@
+"""
+Request/Response Correlator for the Open-APEX Project
+---------------------------------
+Lets several requests be on the wire at once instead of send-one,
+wait, read-one. Every ZDT reply echoes the address and function code, so
+outstanding requests are tracked by (addr, function code) and each
+incoming frame completes the oldest request with that key, whatever order
+the replies arrive in. Each request has its own deadline; a reply that
+never comes only fails its own request.
+
+    cor = Correlator(uart, timeout_ms=20)
+    values = cor.sweep([1, 2, 3, 4, 5, 6], ("S_CPOS", "S_VEL"))   # one burst, {addr: [cpos, vel]}
+    cor.submit(Read_Sys_Params(4, "S_FLAG"), callback=on_flags)   # or drive it from a control loop
+    while cor.pending:
+        cor.poll()
+
+Slots are preallocated (size bounds the requests outstanding) and poll()
+never blocks. By default only one motor has requests on the line at a
+time: a request to another motor is held until every reply from the
+current one is in, so two drivers never answer at once on a shared line.
+With max_in_flight=N up to N requests to any motors are on the line
+instead, for wiring that tolerates overlapping replies. Requests that
+become sendable together go out in one write.
+"""
+
+from utils import stepperMotorControl as smc
+from utils.stepperMotorControl import Read_Sys_Params_Into, SYS_PARAM_CODES, RxRing, Extract_Frame, ticks_ms, ticks_diff
+
+class Correlator:
+    def __init__(self, uart, size=32, timeout_ms=20, max_in_flight=None):
+        self.uart = uart
+        self.timeout_ms = timeout_ms  # Default per-request timeout
+        self.max_in_flight = max_in_flight  # None: one motor at a time
+        self.size = size
+        self._key = [-1] * size  # addr << 8 | expected func, -1 when the slot is free
+        self._sTime = [0] * size
+        self._timeout = [0] * size
+        self._seq = [0] * size  # Submission order, oldest request with a key wins
+        self._cb = [None] * size
+        self._cmd = [None] * size  # Frame of a held request, written by flush()
+        self._sent = bytearray(size)  # 1 once the slot's request is on the line
+        self.values = [None] * size  # Decoded reply per slot, None on timeout or error reply
+        self.done = bytearray(size)  # 1 once the slot's request completed or expired
+        self._nseq = 0
+        self._queue = []  # Held slots, oldest first
+        self._lineAddr = 0  # Motor whose requests are on the line
+        self.inflight = 0  # Requests written and not yet completed
+        self.pending = 0  # Requests not yet completed, held or in flight
+        self.ring = RxRing()
+        self.buf = bytearray(64)
+        self._burst = bytearray(4 * size)
+        self._mv = memoryview(self._burst)
+        self._tx = bytearray(4 * size)  # Per-slot Read_Sys_Params frames encoded by sweep()
+        self._txView = memoryview(self._tx)
+        self.completed = 0
+        self.timeouts = 0
+        self.unmatched = 0  # Replies that matched no pending request (late or unsolicited)
+
+    def submit(self, cmd, func=None, callback=None, timeout_ms=None, write=True):  # Track a request, return its slot or -1 if full
+        # func is the expected reply function code (default: the command's own,
+        # which is what both acks and Read_Sys_Params replies echo).
+        # callback(addr, func, value) runs from poll() when it completes or
+        # expires (value None). The frame is written as soon as the line
+        # allows; write=False tracks a frame the caller already wrote.
+        slot = self.queue(cmd, func, callback, timeout_ms)
+        if slot >= 0:
+            if write:
+                self.flush()
+            else:
+                self._queue.remove(slot)
+                self._on_line(slot, cmd[0])
+        return slot
+
+    def queue(self, cmd, func=None, callback=None, timeout_ms=None):  # Like submit() but held until flush() or poll()
+        # cmd is kept by reference until it is written.
+        slot = self._free_slot()
+        if slot < 0:
+            return -1
+        self._key[slot] = (cmd[0] << 8) | (cmd[1] if func is None else func)
+        self._timeout[slot] = self.timeout_ms if timeout_ms is None else timeout_ms
+        self._cb[slot] = callback
+        self._cmd[slot] = cmd
+        self._sent[slot] = 0
+        self._seq[slot] = self._nseq
+        self._nseq += 1
+        self.values[slot] = None
+        self.done[slot] = 0
+        self.pending += 1
+        self._queue.append(slot)
+        return slot
+
+    def _can_send(self, addr):
+        if self.max_in_flight is None:
+            return not self.inflight or addr == self._lineAddr
+        return self.inflight < self.max_in_flight
+
+    def _on_line(self, slot, addr):
+        self._sent[slot] = 1
+        self._cmd[slot] = None
+        self._sTime[slot] = ticks_ms()
+        self._lineAddr = addr
+        self.inflight += 1
+
+    def flush(self):  # Write every held request the line allows, oldest first, in one write; return how many
+        queue = self._queue
+        n = sent = 0
+        while queue:
+            slot = queue[0]
+            cmd = self._cmd[slot]
+            if not self._can_send(cmd[0]):
+                break
+            m = len(cmd)
+            if n + m > len(self._burst):
+                self.uart.write(self._mv[:n])
+                n = 0
+            if m > len(self._burst):
+                self.uart.write(cmd)
+            else:
+                self._burst[n:n + m] = cmd
+                n += m
+            queue.pop(0)
+            self._on_line(slot, cmd[0])
+            sent += 1
+        if n:
+            self.uart.write(self._mv[:n])
+        return sent
+
+    def _free_slot(self):
+        for k in range(self.size):
+            if self._key[k] < 0:
+                return k
+        return -1
+
+    def _complete(self, slot, value):
+        key = self._key[slot]
+        self._key[slot] = -1
+        if self._sent[slot]:
+            self._sent[slot] = 0
+            self.inflight -= 1
+        self.values[slot] = value
+        self.done[slot] = 1
+        self.pending -= 1
+        cb = self._cb[slot]
+        if cb is not None:
+            self._cb[slot] = None
+            cb(key >> 8, key & 0xFF, value)
+
+    def _match(self, frame):  # Slot of the oldest request on the line the frame answers, -1 if none
+        key = (frame.addr << 8) | frame.func
+        best = -1
+        for k in range(self.size):
+            kk = self._key[k]
+            if kk < 0 or not self._sent[k]:
+                continue
+            if kk == key or (frame.func == 0x00 and kk >> 8 == frame.addr):  # Error reply fails the oldest request to that motor
+                if best < 0 or self._seq[k] < self._seq[best]:
+                    best = k
+        return best
+
+    def poll(self):  # Match buffered replies, expire overdue requests, send held ones; return how many completed
+        n = 0
+        self.ring.fill(self.uart)
+        frame = Extract_Frame(self.ring, self.buf)
+        while frame is not None:
+            slot = self._match(frame)
+            if slot < 0:
+                self.unmatched += 1
+            else:
+                self._complete(slot, frame.value if frame.func != 0x00 else None)
+                self.completed += 1
+                n += 1
+            frame = Extract_Frame(self.ring, self.buf)
+        if self.inflight:
+            now = ticks_ms()
+            for k in range(self.size):
+                if self._key[k] >= 0 and self._sent[k] and ticks_diff(now, self._sTime[k]) > self._timeout[k]:
+                    if smc.stats is not None:
+                        smc.stats.timed_out(self._key[k] & 0xFF)
+                    self._complete(k, None)
+                    self.timeouts += 1
+                    n += 1
+        if self._queue:
+            self.flush()
+        return n
+
+    def cancel(self):  # Forget every pending request (no callbacks)
+        for k in range(self.size):
+            self._key[k] = -1
+            self._cb[k] = None
+            self._cmd[k] = None
+            self._sent[k] = 0
+        self._queue = []
+        self.inflight = 0
+        self.pending = 0
+
+    def sweep(self, addrs, params=("S_CPOS",), timeout_ms=None, max_in_flight=None):  # {addr: [value per param]}, None where missing
+        # Every query is queued and replies are collected in whatever order
+        # they arrive; max_in_flight overrides the Correlator's own limit for
+        # this sweep.
+        addrs = list(addrs)
+        values = {}
+        for addr in addrs:
+            values[addr] = [None] * len(params)
+        store = [self._sweep_cb(values, j) for j in range(len(params))]
+        limit = self.max_in_flight
+        if max_in_flight is not None:
+            self.max_in_flight = max_in_flight
+        try:
+            for addr in addrs:
+                for j, s in enumerate(params):
+                    slot = self._free_slot()
+                    while slot < 0:  # Every slot busy, let some complete
+                        self.poll()
+                        slot = self._free_slot()
+                    m = Read_Sys_Params_Into(self._tx, 4 * slot, addr, s)
+                    self.queue(self._txView[4 * slot:4 * slot + m], SYS_PARAM_CODES[s], store[j], timeout_ms)
+                self.flush()
+            while self.pending:
+                self.poll()
+        finally:
+            self.max_in_flight = limit
+        return values
+
+    def _sweep_cb(self, values, j):
+        def store(addr, func, value):
+            values[addr][j] = value
+        return store
@@ -0,0 +1,151 @@
+"""
+Following-Error Monitor for the Open-APEX Project
+---------------------------------
+Watches how far each joint lags its commanded position and stops the arm
+before a blocked or overloaded joint turns into a crash. The driver's
+position error S_PERR is read for every joint at a fixed rate through a
+Correlator, which paces the queries so
+that one joint answers at a time unless max_in_flight is given. Each
+sample is checked the moment its reply is parsed, against two thresholds:
+
+    max_error_deg      |error| above this trips the joint
+    max_trend_deg_s    |error| growing faster than this trips it early
+                       (only once |error| > trend_min_deg, to ignore jitter)
+
+A trip sends Stop_Now: with stop_all every joint gets an snF Stop_Now
+followed by one Synchronous_motion broadcast, so the whole arm halts
+together; otherwise only the offending joint stops. With recover set, the
+tripped joint's S_FLAG is read afterwards and Reset_Clog_Pro releases stall
+protection if the driver engaged it. Motion is not resumed.
+
+    mon = FollowingMonitor(uart, [1, 2, 3, 4, 5, 6], rate_hz=200, max_error_deg=5.0)
+    while True:
+        mon.poll()                          # non-blocking, call from the control loop
+        if mon.faults:
+            print(mon.faults, mon.report())
+
+Detection latency is the sampling interval plus one reply: a sample is
+judged within microseconds of arriving. At 115200 baud one S_PERR query
+costs about 1 ms per joint, so six joints allow the ~150-200 Hz needed for
+sub-10 ms detection. S_TPOS - S_CPOS is no substitute for S_PERR: S_TPOS
+is the move's target, so the difference is the distance still to go.
+"""
+
+from utils.stepperMotorControl import (FrameTable, Stop_Now, Synchronous_motion, Reset_Clog_Pro, Read_Sys_Params,
+                                       SYS_PARAM_CODES, FLAG_STALL_PROT, ticks_ms, ticks_us, ticks_diff)
+from utils.correlator import Correlator
+
+class FollowingMonitor:
+    def __init__(self, uart, addrs, rate_hz=200, max_error_deg=5.0, max_trend_deg_s=360.0, trend_min_deg=1.0,
+                 stop_all=True, recover=True, timeout_ms=5, on_fault=None, max_in_flight=None):
+        self.uart = uart
+        self.addrs = list(addrs)
+        self.period_us = 1000000 // rate_hz
+        self.max_error = max_error_deg
+        self.max_trend = max_trend_deg_s
+        self.trend_min = trend_min_deg
+        self.stop_all = stop_all
+        self.recover = recover
+        self.on_fault = on_fault  # on_fault(addr, reason, error_deg)
+        n = len(self.addrs)
+        self._index = {}
+        for k, addr in enumerate(self.addrs):
+            self._index[addr] = k
+        # Query frames for one cycle, encoded once
+        table = FrameTable(self.addrs)
+        self._queries = [table.query["S_PERR"][addr] for addr in self.addrs]
+        # Stop frames: snF Stop_Now for every joint plus the trigger, or one plain Stop_Now per joint
+        self._stopAll = b"".join(bytes(Stop_Now(a, True)) for a in self.addrs) + bytes(Synchronous_motion(0))
+        self._stop = [bytes(Stop_Now(a, False)) for a in self.addrs]
+        self.cor = Correlator(uart, len(self._queries) + 2 * n, timeout_ms, max_in_flight)
+        self._onValue = self._on_value  # Bound once, no allocation per submit
+        self._onFlags = self._on_flags
+        # Per-joint state, degrees and degrees/second
+        self.error = [0.0] * n
+        self.trend = [0.0] * n
+        self._sTime = [0] * n  # ticks_us() of the last error sample
+        self._seen = bytearray(n)
+        self.faults = {}  # addr -> reason ("error", "trend", "stall"), cleared by clear()
+        self.recovered = []  # Addresses released with Reset_Clog_Pro
+        self._cTime = ticks_us()
+        self.cycles = 0
+        self.trips = 0
+        self.max_gap_us = 0  # Longest interval between two error samples of one joint
+        self.react_us = 0  # Longest time from a tripping sample to the Stop_Now write
+
+    def poll(self):  # Start a cycle when due and process replies; never blocks, the Correlator paces the queries
+        cor = self.cor
+        if not cor.pending:
+            now = ticks_us()
+            if ticks_diff(now, self._cTime) >= self.period_us:
+                self._cTime = now
+                self.cycles += 1
+                for q in self._queries:
+                    cor.queue(q, None, self._onValue)
+                cor.flush()
+        cor.poll()
+
+    def run(self, duration_ms=0, stop_on_fault=True):  # Poll until duration_ms elapses (0 = forever) or a fault
+        start = ticks_ms()
+        while not duration_ms or ticks_diff(ticks_ms(), start) < duration_ms:
+            self.poll()
+            if stop_on_fault and self.faults and not self.cor.pending:
+                break
+        return self.faults
+
+    def _on_value(self, addr, func, value):  # Correlator callback for every S_PERR sample, None if lost
+        if value is not None:
+            self._evaluate(self._index[addr], addr, value)
+
+    def _evaluate(self, k, addr, err):
+        now = ticks_us()
+        mag = abs(err)
+        if self._seen[k]:
+            dt = ticks_diff(now, self._sTime[k])
+            if dt > self.max_gap_us:
+                self.max_gap_us = dt
+            if dt > 0:
+                rate = (mag - abs(self.error[k])) * 1000000.0 / dt
+                self.trend[k] += (rate - self.trend[k]) * 0.5  # Smoothed growth of |error|
+        self._seen[k] = 1
+        self._sTime[k] = now
+        self.error[k] = err
+        if addr in self.faults:
+            return
+        if mag > self.max_error:
+            self._trip(k, addr, "error", err, now)
+        elif mag > self.trend_min and self.trend[k] > self.max_trend:
+            self._trip(k, addr, "trend", err, now)
+
+    def _trip(self, k, addr, reason, err, sTime):
+        if self.stop_all:
+            self.uart.write(self._stopAll)
+        else:
+            self.uart.write(self._stop[k])
+        react = ticks_diff(ticks_us(), sTime)
+        if react > self.react_us:
+            self.react_us = react
+        self.faults[addr] = reason
+        self.trips += 1
+        if self.recover:
+            self.cor.submit(Read_Sys_Params(addr, "S_FLAG"), None, self._onFlags)
+        if self.on_fault is not None:
+            self.on_fault(addr, reason, err)
+
+    def _on_flags(self, addr, func, flags):  # Stall-recovery path after a trip
+        if flags is not None and flags & FLAG_STALL_PROT:
+            self.uart.write(Reset_Clog_Pro(addr))
+            self.faults[addr] = "stall"
+            self.recovered.append(addr)
+
+    def clear(self, addr=None):  # Re-arm one joint (or all) after the fault was dealt with
+        if addr is None:
+            self.faults.clear()
+            self.recovered = []
+        else:
+            self.faults.pop(addr, None)
+
+    def report(self):  # One-line status for periodic logging
+        return "cycles={} trips={} faults={} max_gap={}us react={}us errors=[{}]".format(
+            self.cycles, self.trips, self.faults, self.max_gap_us, self.react_us,
+            " ".join("{:.2f}".format(e) for e in self.error))
@@ -0,0 +1,143 @@
+"""
+Host-Side asyncio Driver for ZDT Stepper Motors
+---------------------------------
+Drives the ZDT command set from a Linux host over any asyncio stream pair
+(serial_asyncio / pyserial-asyncio, a TCP serial bridge, or the simulator).
+One reader task demultiplexes replies by (address, function code) and
+resolves per-request futures, so many coroutines can query the bus at once:
+
+    driver = await open_serial("/dev/ttyUSB0", 115200)
+    positions = await asyncio.gather(*(driver.query(a, "S_CPOS") for a in range(1, 7)))
+    await driver.send(Pos_Control(1, 0, 1000, 50, 3200, False, False))
+
+By default only one motor has requests on the wire at a time: several
+requests to the same motor overlap (a driver answers them back to back),
+and a request to another motor waits until they are all answered, so two
+drivers never answer at once. max_in_flight=N instead lets up to N requests
+to any motors overlap, for wiring that tolerates it.
+"""
+
+import asyncio
+from collections import deque
+from utils import stepperMotorControl as smc
+from utils.stepperMotorControl import Read_Sys_Params, SYS_PARAM_CODES, Frame_Length, Parse_Frame, Check_Ok
+
+class AsyncDriver:
+    def __init__(self, reader, writer, timeout=0.1, max_in_flight=None):
+        self.reader = reader
+        self.writer = writer
+        self.timeout = timeout  # Default per-request timeout in seconds
+        self._limit = asyncio.Semaphore(max_in_flight) if max_in_flight else None
+        self._lineFree = asyncio.Event()  # Set while no request is in flight (default, per-motor mode)
+        self._lineFree.set()
+        self._lineAddr = 0  # Motor whose requests are in flight
+        self._inflight = 0
+        self._seq = 0
+        self._pending = {}  # addr << 8 | func -> deque of (seq, future), oldest first
+        self._rx = bytearray()
+        self.timeouts = 0
+        self.unmatched = 0  # Replies nobody was waiting for
+        self._task = asyncio.get_running_loop().create_task(self._read_loop())
+
+    async def _read_loop(self):
+        while True:
+            chunk = await self.reader.read(256)
+            if not chunk:
+                break
+            self._rx += chunk
+            self._drain()
+
+    def _drain(self):  # Split the receive buffer into frames and dispatch them
+        rx = self._rx
+        while rx:
+            if rx[0] == 0x00:  # Line noise before the address byte
+                del rx[0]
+                continue
+            length = Frame_Length(rx, 0, len(rx))
+            if length == 0 or len(rx) < length:
+                return
+            if length < 3 or not Check_Ok(rx, 0, length):  # -1: corrupt length byte
+                if smc.stats is not None and length >= 3:
+                    smc.stats.check_errors += 1
+                del rx[0]  # Resync on the next byte
+                continue
+            frame = Parse_Frame(bytes(rx[:length]), length)  # Copy, the payload view must outlive rx
+            del rx[:length]
+            if smc.stats is not None and frame is not None:
+                smc.stats.received(frame)
+            self._dispatch(frame)
+
+    def _dispatch(self, frame):
+        waiters = self._pending.get((frame.addr << 8) | frame.func)
+        if not waiters and frame.func == 0x00:  # Format error reply, fail the oldest request to that address
+            for key, q in self._pending.items():
+                if key >> 8 == frame.addr and q and (not waiters or q[0][0] < waiters[0][0]):
+                    waiters = q
+        while waiters:
+            seq, fut = waiters.popleft()
+            if not fut.done():
+                fut.set_result(frame)
+                return
+        self.unmatched += 1
+
+    async def _claim(self, addr):  # Wait until no other motor has requests in flight
+        while self._inflight and self._lineAddr != addr:
+            self._lineFree.clear()
+            await self._lineFree.wait()
+        self._lineAddr = addr
+        self._inflight += 1
+
+    def _release(self):
+        self._inflight -= 1
+        if not self._inflight:
+            self._lineFree.set()
+
+    async def request(self, cmd, timeout=None):  # Write a frame and wait for its reply, None on timeout
+        addr, func = cmd[0], cmd[1]
+        if addr == 0:  # Broadcast, drivers do not answer
+            self.writer.write(cmd)
+            return None
+        if self._limit is not None:
+            await self._limit.acquire()
+        else:
+            await self._claim(addr)
+        key = (addr << 8) | func
+        fut = asyncio.get_running_loop().create_future()
+        entry = (self._seq, fut)
+        self._seq += 1
+        self._pending.setdefault(key, deque()).append(entry)
+        try:
+            self.writer.write(cmd)
+            return await asyncio.wait_for(fut, self.timeout if timeout is None else timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            if smc.stats is not None:
+                smc.stats.timed_out(func)
+            return None
+        finally:
+            waiters = self._pending.get(key)
+            if waiters and entry in waiters:
+                waiters.remove(entry)
+            if self._limit is not None:
+                self._limit.release()
+            else:
+                self._release()
+
+    async def query(self, addr, s, timeout=None):  # Read_Sys_Params reply decoded, None on timeout or error
+        frame = await self.request(bytes(Read_Sys_Params(addr, s)), timeout)
+        if frame is None or frame.func != SYS_PARAM_CODES[s]:
+            return None
+        return frame.value
+
+    async def send(self, cmd, timeout=None):  # Control command, returns the ack status byte (RESP_OK, ...)
+        frame = await self.request(bytes(cmd), timeout)
+        return None if frame is None else frame.value
+
+    async def close(self):
+        self._task.cancel()
+        self.writer.close()
+
+async def open_serial(port, baudrate=115200, **kwargs):  # Open a serial port with pyserial-asyncio
+    import serial_asyncio  # Host-only dependency: pip install pyserial-asyncio
+    reader, writer = await serial_asyncio.open_serial_connection(url=port, baudrate=baudrate)
+    return AsyncDriver(reader, writer, **kwargs)
@@ -0,0 +1,210 @@
+"""
+Arm Kinematics for the Open-APEX Project (host only, needs NumPy)
+---------------------------------
+DH-parameter driven forward and inverse kinematics for the APEX-360 arm,
+converting Cartesian tool poses to joint angles and then to Pos_Control
+pulse counts. IK is damped least squares, vectorized across whole paths,
+and single-pose solutions are kept in an LRU cache so repeated pick/place
+poses are free.
+
+    arm = Arm([(0, 90, 120, 0), (200, 0, 0, 90), (180, 0, 0, 0)], addrs=[1, 2, 3], gear_ratios=[10, 20, 20])
+    q = arm.ik([250.0, 0.0, 150.0])                # degrees per joint, None if unreachable
+    Sync_Move(uart, arm.moves(q, vel=300, acc=200))
+    qs, ok = arm.ik_batch(path_xyz)               # (N, 3) positions or (N, 4, 4) poses
+
+DH rows are (a, alpha, d, theta_offset) with standard DH convention, lengths
+in mm and angles in degrees. Targets are a 3-vector (position only) or a
+4x4 homogeneous transform (position and orientation). IK results are
+wrapped to (-180, 180] (or into limits), so pulse counts never carry extra
+turns; unsolved targets are retried from each pose in seeds.
+"""
+
+import math
+from collections import OrderedDict
+import numpy as np
+
+def _dh_transforms(theta, a, alpha, d):  # (N,) joint angles in radians -> (N, 4, 4)
+    ct, st = np.cos(theta), np.sin(theta)
+    ca, sa = math.cos(alpha), math.sin(alpha)
+    T = np.zeros(theta.shape + (4, 4))
+    T[:, 0, 0] = ct
+    T[:, 0, 1] = -st * ca
+    T[:, 0, 2] = st * sa
+    T[:, 0, 3] = a * ct
+    T[:, 1, 0] = st
+    T[:, 1, 1] = ct * ca
+    T[:, 1, 2] = -ct * sa
+    T[:, 1, 3] = a * st
+    T[:, 2, 1] = sa
+    T[:, 2, 2] = ca
+    T[:, 2, 3] = d
+    T[:, 3, 3] = 1.0
+    return T
+
+def _rotation_error(R_target, R):  # Axis-angle vector rotating R onto R_target, (N, 3)
+    E = R_target @ np.swapaxes(R, 1, 2)
+    w = 0.5 * np.stack([E[:, 2, 1] - E[:, 1, 2], E[:, 0, 2] - E[:, 2, 0], E[:, 1, 0] - E[:, 0, 1]], axis=1)
+    s = np.linalg.norm(w, axis=1)
+    c = (np.trace(E, axis1=1, axis2=2) - 1.0) * 0.5
+    angle = np.arctan2(s, c)
+    scale = np.where(s > 1e-9, angle / np.maximum(s, 1e-12), 1.0)
+    return w * scale[:, None]
+
+class Arm:
+    def __init__(self, dh, addrs=None, gear_ratios=1.0, pulses_per_rev=3200, limits=None,
+                 cache_size=128, tol=1e-3, max_iter=200, damping=0.5, seeds=None):
+        self.dh = [(float(a), math.radians(alpha), float(d), math.radians(off)) for a, alpha, d, off in dh]
+        n = len(self.dh)
+        self.n = n
+        self.addrs = list(addrs) if addrs is not None else list(range(1, n + 1))
+        self.gear_ratios = np.broadcast_to(np.asarray(gear_ratios, dtype=float), (n,)).copy()
+        self.pulses_per_rev = pulses_per_rev
+        self.limits = None if limits is None else np.radians(np.asarray(limits, dtype=float))  # (n, 2) degrees
+        self.tol = tol  # Converged when position error (mm) and orientation error (rad) are below this
+        self.max_iter = max_iter
+        self.damping = damping
+        # IK starting poses (degrees), tried in order for targets that did not
+        # converge. All-zero is the stretched, singular pose, so the defaults bend every joint.
+        if seeds is None:
+            bent = ([0.0] + [45.0, -90.0] * n)[:n]
+            seeds = [bent, [30.0] * n, [-30.0] * n]
+        self.seeds = [np.radians(np.asarray(sd, dtype=float)) for sd in seeds]
+        self._last = None  # Last ik() solution, seeds the next call
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    # --- Forward kinematics ---
+
+    def _chain(self, q):  # q (N, n) radians -> list of base-to-joint transforms, each (N, 4, 4)
+        T = np.broadcast_to(np.eye(4), (q.shape[0], 4, 4))
+        frames = [T]
+        for j, (a, alpha, d, off) in enumerate(self.dh):
+            T = T @ _dh_transforms(q[:, j] + off, a, alpha, d)
+            frames.append(T)
+        return frames
+
+    def fk_batch(self, q_deg):  # (N, n) joint angles in degrees -> (N, 4, 4) tool poses
+        return self._chain(np.radians(np.atleast_2d(np.asarray(q_deg, dtype=float))))[-1]
+
+    def fk(self, q_deg):  # Tool pose (4x4) for one joint configuration
+        return self.fk_batch([q_deg])[0]
+
+    # --- Inverse kinematics ---
+
+    def _jacobian(self, frames, full):  # Geometric Jacobian, (N, 6 or 3, n)
+        p_end = frames[-1][:, :3, 3]
+        cols = []
+        for j in range(self.n):
+            z = frames[j][:, :3, 2]
+            lin = np.cross(z, p_end - frames[j][:, :3, 3])
+            cols.append(np.concatenate([lin, z], axis=1) if full else lin)
+        return np.stack(cols, axis=2)
+
+    def _wrap(self, q):  # Radians -> (-pi, pi], or the equivalent angle inside limits when given
+        w = q - 2.0 * np.pi * np.ceil((q - np.pi) / (2.0 * np.pi))
+        if self.limits is None:
+            return w
+        out = q.copy()
+        placed = np.zeros(q.shape, dtype=bool)
+        for shift in (0.0, 2.0 * np.pi, -2.0 * np.pi):
+            c = w + shift
+            fit = (c >= self.limits[:, 0]) & (c <= self.limits[:, 1]) & ~placed
+            out[fit] = c[fit]
+            placed |= fit
+        return out
+
+    def _solve(self, p_target, R_target, q):  # DLS iterations from q (N, n) radians, in place; converged mask
+        N = p_target.shape[0]
+        full = R_target is not None
+        active = np.ones(N, dtype=bool)
+        lam2 = self.damping ** 2
+        for _ in range(self.max_iter):
+            idx = np.nonzero(active)[0]
+            if not idx.size:
+                break
+            frames = self._chain(q[idx])
+            err = p_target[idx] - frames[-1][:, :3, 3]
+            if full:
+                err = np.concatenate([err, _rotation_error(R_target[idx], frames[-1][:, :3, :3])], axis=1)
+            done = np.max(np.abs(err), axis=1) < self.tol
+            active[idx[done]] = False
+            keep = ~done
+            if not keep.any():
+                break
+            idx, err = idx[keep], err[keep]
+            J = self._jacobian([f[keep] for f in frames], full)
+            JJt = J @ np.swapaxes(J, 1, 2) + lam2 * np.eye(J.shape[1])
+            dq = (np.swapaxes(J, 1, 2) @ np.linalg.solve(JJt, err[:, :, None]))[:, :, 0]
+            q[idx] = self._wrap(q[idx] + dq)  # Keep angles bounded so pulse counts stay within one turn
+            if self.limits is not None:
+                q[idx] = np.clip(q[idx], self.limits[:, 0], self.limits[:, 1])
+        return ~active
+
+    def ik_batch(self, targets, seed=None):  # Joint angles (N, n) in degrees and a converged mask (N,)
+        # Starts from seed (degrees, (n,) or (N, n)) when given, then from
+        # each of self.seeds for the targets still unsolved. Angles are
+        # wrapped to (-180, 180], or into limits when given.
+        targets = np.asarray(targets, dtype=float)
+        full = targets.ndim >= 2 and targets.shape[-2:] == (4, 4)
+        if full:
+            targets = targets.reshape(-1, 4, 4)
+            p_target, R_target = targets[:, :3, 3], targets[:, :3, :3]
+        else:
+            p_target, R_target = targets.reshape(-1, 3), None
+        N = p_target.shape[0]
+        starts = list(self.seeds)
+        if seed is not None:
+            starts.insert(0, np.radians(np.asarray(seed, dtype=float)))
+        q = np.empty((N, self.n))
+        ok = np.zeros(N, dtype=bool)
+        for start in starts:
+            idx = np.nonzero(~ok)[0]
+            if not idx.size:
+                break
+            qi = np.broadcast_to(start, (N, self.n))[idx].copy()
+            if self.limits is not None:
+                qi = np.clip(qi, self.limits[:, 0], self.limits[:, 1])
+            conv = self._solve(p_target[idx], None if R_target is None else R_target[idx], qi)
+            q[idx] = qi  # Unconverged rows keep the last attempt
+            ok[idx[conv]] = True
+        return np.degrees(q), ok
+
+    def ik(self, target, seed=None):  # Cached single-pose IK, joint angles in degrees or None if unreachable
+        # Without an explicit seed the previous solution is tried first, so
+        # consecutive poses stay on the same branch (elbow up/down). An
+        # explicit seed is part of the cache key; the implicit one is not.
+        target = np.asarray(target, dtype=float)
+        key = tuple(np.round(target.ravel(), 3).tolist())  # 1 um / 1e-3 quantization
+        if seed is not None:
+            key += tuple(np.round(np.asarray(seed, dtype=float).ravel(), 3).tolist())
+        q = self._cache.get(key)
+        if q is not None:
+            self._cache.move_to_end(key)
+            self.cache_hits += 1
+            self._last = q
+            return q.copy()
+        self.cache_misses += 1
+        qs, ok = self.ik_batch(target[None], seed if seed is not None else self._last)
+        if not ok[0]:
+            return None
+        q = qs[0]
+        self._cache[key] = q
+        self._last = q
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return q.copy()
+
+    def clear_cache(self):
+        self._cache.clear()
+        self._last = None
+
+    # --- Motor conversion ---
+
+    def to_pulses(self, q_deg):  # Joint degrees -> signed absolute pulse counts, works on (n,) or (N, n)
+        motor_deg = np.asarray(q_deg, dtype=float) * self.gear_ratios
+        return np.rint(motor_deg * self.pulses_per_rev / 360.0).astype(np.int64)
+
+    def moves(self, q_deg, vel, acc):  # (addr, pulses, vel, acc) tuples for Sync_Move
+        return [(addr, int(p), vel, acc) for addr, p in zip(self.addrs, self.to_pulses(q_deg))]
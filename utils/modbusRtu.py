@@ -0,0 +1,168 @@
+"""
+Modbus-RTU Backend for ZDT Stepper Motors
+---------------------------------
+Carries the same operations as the native framing (Pos_Control, Vel_Control,
+Read_Sys_Params, ...) over Modbus-RTU for PLC-side tooling. The register map
+follows the native protocol: each command or parameter group lives at the
+register numbered by its native function code, and its payload is the native
+payload (without the check byte) packed big-endian into 16-bit registers and
+zero-padded to a whole register.
+
+    mb = ModbusBackend(uart)
+    mb.send(Pos_Control(1, 0, 1000, 50, 3200, False, False))    # any native builder
+    mb.query(1, "S_CPOS")                                       # decoded like the native reply
+    st = mb.read_state(1)                                        # one block read: position, speed, flags, ...
+
+Commands are Write Multiple Registers (0x10), reads are Read Input Registers
+(0x04). read_state() fetches the S_State block (14 registers) in a single
+request instead of separate S_CPOS, S_VEL and S_FLAG reads. Check the driver
+manual for the firmware's register numbering and adjust REGISTERS if it differs.
+"""
+
+from utils.stepperMotorControl import (SYS_PARAM_CODES, RESPONSE_LENGTHS, DECODED_LENGTHS, DECODERS,
+                                       RxRing, ticks_ms, ticks_diff)
+
+FC_READ_INPUT = 0x04
+FC_WRITE_SINGLE = 0x06
+FC_WRITE_MULTIPLE = 0x10
+
+# Parameter group -> (start register, register count), derived from the native reply layout
+REGISTERS = {}
+for _name, _func in SYS_PARAM_CODES.items():
+    _payload = (RESPONSE_LENGTHS[_func] or DECODED_LENGTHS.get(_func, 33)) - 3
+    REGISTERS[_name] = (_func, (_payload + 1) // 2)
+del _name, _func, _payload
+
+def _crc16_table():
+    table = []
+    for i in range(256):
+        c = i
+        for _ in range(8):
+            c = (c >> 1) ^ 0xA001 if c & 1 else c >> 1
+        table.append(c)
+    return table
+
+CRC16_TABLE = _crc16_table()
+
+def Crc16(buf, ofs, n):  # CRC-16/Modbus (poly 0xA001 reflected, init 0xFFFF), table driven
+    c = 0xFFFF
+    table = CRC16_TABLE
+    for k in range(ofs, ofs + n):
+        c = (c >> 8) ^ table[(c ^ buf[k]) & 0xFF]
+    return c
+
+def _seal(buf, n):  # Append the CRC, low byte first, return the frame length
+    c = Crc16(buf, 0, n)
+    buf[n] = c & 0xFF
+    buf[n + 1] = c >> 8
+    return n + 2
+
+def Read_Registers_Into(buf, addr, reg, count, fc=FC_READ_INPUT):  # Read request, returns frame length
+    buf[0] = addr
+    buf[1] = fc
+    buf[2] = reg >> 8
+    buf[3] = reg & 0xFF
+    buf[4] = count >> 8
+    buf[5] = count & 0xFF
+    return _seal(buf, 6)
+
+def Write_Registers_Into(buf, addr, reg, data, ofs=0, n=None):  # Write Multiple Registers carrying data[ofs:ofs+n]
+    if n is None:
+        n = len(data) - ofs
+    count = (n + 1) // 2
+    buf[0] = addr
+    buf[1] = FC_WRITE_MULTIPLE
+    buf[2] = reg >> 8
+    buf[3] = reg & 0xFF
+    buf[4] = count >> 8
+    buf[5] = count & 0xFF
+    buf[6] = count * 2
+    for k in range(n):
+        buf[7 + k] = data[ofs + k]
+    if n & 1:
+        buf[7 + n] = 0  # Pad to a whole register
+    return _seal(buf, 7 + count * 2)
+
+def Response_Length(buf, n):  # Expected length of the Modbus reply at buf[0], 0 if not yet known
+    if n < 3:
+        return 0
+    fc = buf[1]
+    if fc & 0x80:
+        return 5  # Exception: addr, fc | 0x80, code, CRC
+    if fc in (0x03, FC_READ_INPUT):
+        return 5 + buf[2]
+    return 8  # Write echo: addr, fc, reg, count/value, CRC
+
+class ModbusError(Exception):  # Exception reply from the driver
+    def __init__(self, addr, fc, code):
+        Exception.__init__(self, "Modbus exception 0x{:02X} from addr {} (fc 0x{:02X})".format(code, addr, fc))
+        self.addr = addr
+        self.fc = fc
+        self.code = code
+
+class ModbusBackend:
+    def __init__(self, uart, timeout_ms=100):
+        self.uart = uart
+        self.timeout_ms = timeout_ms
+        self.ring = RxRing()
+        self.tx = bytearray(80)
+        self.rx = bytearray(80)
+        self.crc_errors = 0
+        self.bad_replies = 0  # Well-formed replies from the wrong slave, function or byte count
+
+    def _transact(self, n):  # Send tx[:n], return the reply length in rx, 0 on timeout
+        self.ring.clear()
+        self.uart.write(memoryview(self.tx)[:n])
+        ring = self.ring
+        lTime = ticks_ms()
+        while True:
+            if ring.fill(self.uart):
+                lTime = ticks_ms()
+            length = Response_Length(ring, ring.count)
+            if length > len(self.rx):  # Garbled byte count, larger than any reply
+                ring.clear()
+                self.bad_replies += 1
+                return 0
+            if length and ring.count >= length:
+                ring.read_into(self.rx, length)
+                rx = self.rx
+                if Crc16(rx, 0, length - 2) != (rx[length - 2] | (rx[length - 1] << 8)):
+                    self.crc_errors += 1
+                    return 0
+                if rx[1] & 0x80:
+                    raise ModbusError(rx[0], rx[1] & 0x7F, rx[2])
+                return length
+            if ticks_diff(ticks_ms(), lTime) > self.timeout_ms:
+                return 0
+
+    def send(self, cmd):  # Execute a native command frame (from any builder) as a register write, True if echoed
+        n = Write_Registers_Into(self.tx, cmd[0], cmd[1], cmd, 2, len(cmd) - 3)
+        if cmd[0] == 0:  # Broadcast, no reply
+            self.uart.write(memoryview(self.tx)[:n])
+            return True
+        if self._transact(n) != 8:
+            return False
+        rx = self.rx
+        if rx[0] != cmd[0] or rx[1] != FC_WRITE_MULTIPLE:
+            self.bad_replies += 1
+            return False
+        return True
+
+    def read_registers(self, addr, reg, count, fc=FC_READ_INPUT):  # Raw register block, memoryview of 2*count bytes or None
+        if not self._transact(Read_Registers_Into(self.tx, addr, reg, count, fc)):
+            return None
+        rx = self.rx
+        if rx[0] != addr or rx[1] != fc or rx[2] != 2 * count:  # Not the reply to this request
+            self.bad_replies += 1
+            return None
+        return memoryview(rx)[3:3 + rx[2]]
+
+    def query(self, addr, s):  # Read_Sys_Params equivalent, decoded like the native reply
+        reg, count = REGISTERS[s]
+        if self.read_registers(addr, reg, count) is None:
+            return None
+        decoder = DECODERS.get(SYS_PARAM_CODES[s])
+        return decoder(self.rx, 3) if decoder is not None else bytes(self.rx[3:3 + self.rx[2]])
+
+    def read_state(self, addr):  # Position, speed, error, current, voltage and flags in one round trip
+        return self.query(addr, "S_State")
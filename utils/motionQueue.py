@@ -0,0 +1,94 @@
+"""
+Streaming Motion Queue for the Open-APEX Project
+---------------------------------
+Executes a long stream of moves without stalling the arm or buffering the
+whole program. Each move is a list of (addr, target, vel, acc) joint moves
+dispatched together with Sync_Move. Up to `lookahead` moves are pre-encoded
+into fixed slots; the next one is sent as soon as S_FLAG reports "position
+reached" for every joint of the current one. A full window pushes back on
+the producer: put() refuses, and run() stops pulling from the generator.
+
+    q = MotionQueue(uart, lookahead=4)
+    q.run(move for move in program)       # or q.put(move) / q.step() from a control loop
+
+A stall flag on any joint stops the queue and records the address in fault.
+"""
+
+from utils.stepperMotorControl import Sync_Move_Into, Sync_Move_Length, Sync_Move_Buffer, Query, FLAG_REACHED, FLAG_STALL, ticks_ms, ticks_diff, sleep_ms
+
+class MotionQueue:
+    def __init__(self, uart, lookahead=4, max_joints=6, poll_ms=5, timeout_ms=20):
+        self.uart = uart
+        self.poll_ms = poll_ms  # Interval between S_FLAG sweeps of the active move
+        self.timeout_ms = timeout_ms  # Per flag query
+        # Look-ahead window: preallocated frame slots used as a ring
+        self._slots = [bytearray(Sync_Move_Length(max_joints)) for _ in range(lookahead)]
+        self._lens = [0] * lookahead
+        self._addrs = [None] * lookahead
+        self._head = 0  # Next slot to dispatch
+        self._count = 0
+        self._active = None  # Addresses of the move in progress
+        self._pTime = 0
+        self.fault = None  # Address that reported a stall
+        self.dispatched = 0
+        self.completed = 0
+
+    def full(self):
+        return self._count == len(self._slots)
+
+    def idle(self):
+        return self._active is None and self._count == 0
+
+    def put(self, moves):  # Encode a move into the window, False if full (producer must retry later)
+        if self.full():
+            return False
+        k = (self._head + self._count) % len(self._slots)
+        self._slots[k] = Sync_Move_Buffer(self._slots[k], len(moves))  # More joints than max_joints: grow this slot
+        self._lens[k] = Sync_Move_Into(self._slots[k], 0, moves)
+        self._addrs[k] = [m[0] for m in moves]
+        self._count += 1
+        return True
+
+    def step(self):  # Advance the queue without blocking beyond the flag queries, True while work remains
+        if self.fault is not None:
+            return False
+        if self._active is not None:
+            if ticks_diff(ticks_ms(), self._pTime) < self.poll_ms:
+                return True
+            self._pTime = ticks_ms()
+            for addr in self._active:
+                flags = Query(self.uart, addr, "S_FLAG", self.timeout_ms)
+                if flags is None:
+                    return True  # Lost reply, retry on the next sweep
+                if flags & FLAG_STALL:
+                    self.fault = addr
+                    return False
+                if not flags & FLAG_REACHED:
+                    return True
+            self._active = None
+            self.completed += 1
+        if self._count:
+            k = self._head
+            self.uart.write(memoryview(self._slots[k])[:self._lens[k]])
+            self._active = self._addrs[k]
+            self._head = (k + 1) % len(self._slots)
+            self._count -= 1
+            self.dispatched += 1
+            self._pTime = ticks_ms()
+        return not self.idle()
+
+    def run(self, source):  # Drain a generator of moves, pulling only while the window has room
+        source = iter(source)
+        open_ = True
+        while True:
+            while open_ and not self.full():
+                try:
+                    self.put(next(source))
+                except StopIteration:
+                    open_ = False
+            busy = self.step()
+            if self.fault is not None:
+                return False
+            if not busy and not open_:
+                return True
+            sleep_ms(1)
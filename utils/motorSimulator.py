@@ -0,0 +1,396 @@
+"""
+ZDT Stepper Motor Bus Simulator for the Open-APEX Project
+---------------------------------
+Host-side stand-in for a UART with ZDT drivers attached. SimBus accepts the
+frames produced by the command builders, models each motor's position,
+velocity, acceleration, enable, stall and homing state, and answers with
+correctly framed responses that become readable at baud-rate-accurate times.
+Set bus.motors[addr].jammed to hold a shaft while its commanded profile runs
+on; S_PERR then reports the growing following error until stall protection
+trips.
+
+Every driver shares one return line. A driver sends its own replies back to
+back, but nothing stops two drivers from answering at once: bytes whose
+time slots overlap are merged (wired-AND of the two bytes, as on an
+idle-high line), so the host sees a garbled frame, fails its check byte and
+resyncs. bus.collisions counts the replies that overlapped another.
+
+    bus = SimBus([1, 2, 3], baudrate=115200)
+    bus.write(Pos_Control(1, 0, 600, 0, 3200, True, False))
+    Real_time_location(bus, 1)
+
+SimBus implements the subset of machine.UART used by this library (any, read,
+readinto, write), so Receive_Frame, Telemetry and PollScheduler run against
+it unchanged. sim_streams() adapts it to the asyncio AsyncDriver.
+"""
+
+import time
+import math
+from utils.stepperMotorControl import Checksum, Check_Ok, Command_Length
+
+PULSES_PER_REV = 3200  # 200 full steps x 16 microsteps, the driver default
+
+def _u16(v):
+    v = int(v) & 0xFFFF
+    return bytes((v >> 8, v & 0xFF))
+
+def _u32(v):
+    v = int(v) & 0xFFFFFFFF
+    return bytes((v >> 24, (v >> 16) & 0xFF, (v >> 8) & 0xFF, v & 0xFF))
+
+def _signed_pos(revs):  # Sign byte + uint32 in 1/65536 rev, as S_CPOS/S_TPOS/S_PERR report
+    return bytes((1 if revs < 0 else 0,)) + _u32(round(abs(revs) * 65536))
+
+def _signed_vel(rps):  # Sign byte + uint16 RPM
+    return bytes((1 if rps < 0 else 0,)) + _u16(round(abs(rps) * 60))
+
+class SimMotor:  # Kinematic model of one driver, positions in revolutions
+    def __init__(self, addr):
+        self.addr = addr
+        self.pos = 0.0
+        self.vel = 0.0  # rev/s, signed
+        self.target = 0.0
+        self.max_vel = 0.0  # rev/s for the current move
+        self.accel = 0.0  # rev/s^2, 0 = step change
+        self.mode = 0  # 0 = idle, 1 = position, 2 = velocity
+        self.enabled = True
+        self.stalled = False  # Stall detected, motion blocked until Reset_Clog_Pro
+        self.jammed = False  # Fault injection: shaft held while the commanded profile runs on
+        self.slip = 0.0  # Revolutions the shaft lags the commanded profile (S_PERR)
+        self.stall_slip = 0.5  # Following error at which stall protection trips
+        self.homing = False
+        self.homing_failed = False
+        self.o_vel = 30  # Homing speed in RPM
+        self.pending = None  # Move buffered by snF until Synchronous_motion
+        self.vbus = 24000  # mV
+        self.ctrl_mode = 1
+
+    @staticmethod
+    def accel_from_code(acc):  # ZDT acc code: each 1 RPM step takes (256 - acc) x 50 us
+        return 0.0 if acc == 0 else 1.0 / ((256 - acc) * 50e-6) / 60.0
+
+    def start_position(self, target, vel_rpm, acc):
+        self.target = target
+        self.max_vel = vel_rpm / 60.0
+        self.accel = self.accel_from_code(acc)
+        self.mode = 1
+
+    def start_velocity(self, vel_rps, acc):
+        self.target = vel_rps
+        self.accel = self.accel_from_code(acc)
+        self.mode = 2
+
+    def stop(self):
+        self.mode = 0
+        self.vel = 0.0
+        self.release()
+        self.target = self.pos
+        self.homing = False
+
+    @property
+    def reached(self):
+        return self.mode != 2 and self.vel == 0.0 and abs(self.target - self.pos) < 1e-6
+
+    def release(self):  # Drop the following error: the profile restarts from where the shaft is
+        self.pos -= self.slip
+        self.slip = 0.0
+
+    @property
+    def actual(self):  # Shaft position, revolutions
+        return self.pos - self.slip
+
+    def step(self, dt):  # Advance the model by dt seconds
+        p0 = self.pos
+        self._profile(dt)
+        if self.jammed:  # The error builds up until stall protection trips
+            self.slip += self.pos - p0
+            if abs(self.slip) > self.stall_slip:
+                self.stalled = True
+
+    def _profile(self, dt):  # Commanded motion profile
+        if self.stalled or not self.enabled:
+            self.vel = 0.0
+            return
+        if self.mode == 1:
+            remaining = self.target - self.pos
+            if abs(remaining) < 1e-9 and abs(self.vel) < 1e-9:
+                self.pos, self.vel, self.mode = self.target, 0.0, 0
+                self._homed()
+                return
+            direction = 1.0 if remaining > 0 else -1.0
+            goal = self.max_vel if not self.accel else min(self.max_vel, math.sqrt(2.0 * self.accel * abs(remaining)))
+            self._ramp(direction * goal, dt)
+            new = self.pos + self.vel * dt
+            if (self.target - new) * direction <= 0:  # Arrived or overshot this step
+                self.pos, self.vel, self.mode = self.target, 0.0, 0
+                self._homed()
+            else:
+                self.pos = new
+        elif self.mode == 2:
+            self._ramp(self.target, dt)
+            self.pos += self.vel * dt
+
+    def _ramp(self, goal, dt):
+        if not self.accel:
+            self.vel = goal
+        elif self.vel < goal:
+            self.vel = min(goal, self.vel + self.accel * dt)
+        else:
+            self.vel = max(goal, self.vel - self.accel * dt)
+
+    def _homed(self):
+        if self.homing:
+            self.homing = False
+            self.pos = self.target = 0.0
+
+    def flags(self):  # S_FLAG: bit0 enabled, bit1 position reached, bit2 stalled, bit3 stall protection
+        return (self.enabled and 0x01) | (self.reached and 0x02) | (self.stalled and 0x0C)
+
+    def org_flags(self):  # S_ORG: bit0 encoder ready, bit1 calibration ready, bit2 homing, bit3 homing failed
+        return 0x03 | (self.homing and 0x04) | (self.homing_failed and 0x08)
+
+class SimBus:  # machine.UART stand-in with one or more simulated drivers attached
+    def __init__(self, addrs=(1,), baudrate=115200, latency_s=0.0002, clock=None):
+        self.motors = {a: SimMotor(a) for a in addrs}
+        self.byte_time = 10.0 / baudrate if baudrate else 0.0  # 8N1: 10 bits per byte
+        self.latency_s = latency_s  # Driver processing time before it answers
+        self.clock = clock or time.perf_counter  # Seconds; resolved here so importing never needs perf_counter
+        self._rx = bytearray()  # Command bytes not yet framed
+        self._out = []  # [ready_time, byte, addr] for bytes on their way to the host, in time order
+        self._tx_free = 0.0  # Time the host->driver line is idle again
+        self._busy = {}  # addr -> time that driver finishes its queued replies
+        self._t = self.clock()
+        self.frames_in = 0
+        self.frames_out = 0
+        self.collisions = 0  # Replies that overlapped another driver's reply on the line
+
+    # --- UART interface ---
+
+    def write(self, buf):
+        now = self._advance()
+        done = max(now, self._tx_free) + len(buf) * self.byte_time
+        self._tx_free = done
+        self._rx += buf
+        self._process(done)
+        return len(buf)
+
+    def any(self):
+        now = self._advance()
+        n = 0
+        for entry in self._out:
+            if entry[0] > now:
+                break
+            n += 1
+        return n
+
+    def read(self, nbytes=None):
+        n = self.any()
+        if nbytes is not None:
+            n = min(n, nbytes)
+        if not n:
+            return None
+        data = bytes(entry[1] for entry in self._out[:n])
+        del self._out[:n]
+        return data
+
+    def readinto(self, buf, nbytes=None):
+        data = self.read(len(buf) if nbytes is None else min(nbytes, len(buf)))
+        if data is None:
+            return None
+        buf[:len(data)] = data
+        return len(data)
+
+    def next_ready(self):  # Time the next byte becomes readable, None if nothing is queued
+        return self._out[0][0] if self._out else None
+
+    # --- Simulation ---
+
+    def _advance(self):  # Step all motors up to now in <= 1 ms slices
+        now = self.clock()
+        dt = now - self._t
+        while dt > 0:
+            h = min(dt, 0.001)
+            for m in self.motors.values():
+                m.step(h)
+            dt -= h
+        self._t = now
+        return now
+
+    def _reply(self, t, data):  # Queue a reply (without its check byte) for delivery, merging any overlap
+        data += bytes((Checksum(data, 0, len(data)),))
+        addr = data[0]
+        bt = self.byte_time
+        start = max(t + self.latency_s, self._busy.get(addr, 0.0))  # A driver's own replies go back to back
+        self._busy[addr] = start + len(data) * bt
+        out = self._out
+        clash = False
+        i = 0
+        for k, b in enumerate(data):
+            ready = start + (k + 1) * bt
+            while i < len(out) and out[i][0] <= ready - bt:
+                i += 1
+            if i < len(out) and out[i][0] < ready + bt and out[i][2] != addr:
+                out[i][1] &= b  # Two drivers on the line in the same byte slot
+                clash = True
+            else:
+                out.insert(i, [ready, b, addr])
+            i += 1
+        if clash:
+            self.collisions += 1
+        self.frames_out += 1
+
+    def _process(self, t):  # Frame and execute every complete command in the receive buffer
+        rx = self._rx
+        while len(rx) >= 3:
+            length = Command_Length(rx, 0, len(rx))
+            if len(rx) < length:
+                return
+            frame = bytes(rx[:length])
+            del rx[:length]
+            self.frames_in += 1
+            tf = t - len(rx) * self.byte_time  # Last byte of this frame arrived; the rest of the write is still coming
+            addr = frame[0]
+            targets = list(self.motors.values()) if addr == 0 else [self.motors[addr]] if addr in self.motors else []
+            if not Check_Ok(frame, 0, length):
+                for m in targets:
+                    if addr:
+                        self._reply(tf, bytes((addr, 0x00, 0xEE)))
+                continue
+            for m in targets:
+                resp = self._execute(m, frame)
+                if addr and resp is not None:  # Broadcast commands are not answered
+                    self._reply(tf, resp)
+
+    def _execute(self, m, f):
+        a, func = m.addr, f[1]
+        ack = bytes((a, func, 0x02))
+        cond = bytes((a, func, 0xE2))
+        if func == 0xFD:  # Pos_Control
+            if not m.enabled or m.stalled:
+                return cond
+            revs = ((f[6] << 24) | (f[7] << 16) | (f[8] << 8) | f[9]) / PULSES_PER_REV
+            revs = -revs if f[2] else revs
+            target = revs if f[10] else m.target + revs  # raF: 1 = absolute, 0 = relative
+            move = (1, target, (f[3] << 8) | f[4], f[5])
+            self._start(m, move, f[11])
+            return ack
+        if func == 0xF6:  # Vel_Control
+            if not m.enabled or m.stalled:
+                return cond
+            rps = ((f[3] << 8) | f[4]) / 60.0
+            self._start(m, (2, -rps if f[2] else rps, 0, f[5]), f[6])
+            return ack
+        if func == 0xF3:  # En_Control
+            m.enabled = bool(f[3])
+            if not m.enabled:
+                m.stop()
+            return ack
+        if func == 0xFE:  # Stop_Now
+            m.stop()
+            return ack
+        if func == 0xFF:  # Synchronous_motion
+            if m.pending is not None:
+                self._start(m, m.pending, False)
+                m.pending = None
+            return ack
+        if func == 0x0A:  # Reset_CurPos_To_Zero
+            m.pos = m.target = m.slip = 0.0
+            return ack
+        if func == 0x0E:  # Reset_Clog_Pro
+            m.stalled = False
+            m.release()
+            m.target = m.pos
+            return ack
+        if func == 0x9A:  # Origin_Trigger_Return
+            if not m.enabled or m.stalled:
+                return cond
+            m.homing = True
+            m.homing_failed = False
+            self._start(m, (1, 0.0, m.o_vel, 0), f[3])
+            return ack
+        if func == 0x9C:  # Origin_Interrupt
+            if m.homing:
+                m.stop()
+            return ack
+        if func == 0x4C:  # Origin_Modify_Params
+            m.o_vel = (f[6] << 8) | f[7]
+            return ack
+        if func == 0x46:  # Modify_Ctrl_Mode
+            m.ctrl_mode = f[4]
+            return ack
+        if func == 0x93:  # Origin_Set_O
+            return ack
+        return self._query(m, f)
+
+    def _start(self, m, move, snF):
+        if snF:
+            m.pending = move
+        elif move[0] == 1:
+            m.start_position(move[1], move[2], move[3])
+        else:
+            m.start_velocity(move[1], move[3])
+
+    def _query(self, m, f):  # Read_Sys_Params replies, check byte appended by _reply
+        a, func = m.addr, f[1]
+        enc = _u16(round((m.actual % 1.0) * 65536))
+        if func == 0x1F:
+            body = bytes((0xF4, 0x78))  # Firmware / hardware version
+        elif func == 0x20:
+            body = _u16(1200) + _u16(2800)  # Phase resistance mOhm, inductance uH
+        elif func == 0x21:
+            body = _u32(18000) + _u32(10) + _u32(18000)  # Kp, Ki, Kd
+        elif func == 0x24:
+            body = _u16(m.vbus)
+        elif func == 0x27:
+            body = _u16(800 if m.vel else 300)  # Phase current mA
+        elif func == 0x31:
+            body = enc
+        elif func == 0x33:
+            body = _signed_pos(m.target if m.mode != 2 else m.pos)  # Target of the current move
+        elif func == 0x35:
+            body = _signed_vel(m.vel)
+        elif func == 0x36:
+            body = _signed_pos(m.actual)
+        elif func == 0x37:
+            body = _signed_pos(m.slip)
+        elif func == 0x3A:
+            body = bytes((m.flags(),))
+        elif func == 0x3B:
+            body = bytes((m.org_flags(),))
+        elif func == 0x42:
+            body = (bytes((0x21, 0x15, 0x19, 0x01, 0x02, 0x02, 0x00, 0x10, 0x01, 0x00))
+                    + _u16(1000) + _u16(3000) + _u16(3000) + _u16(1000)
+                    + bytes((0x05, 0x07, a, 0x00, 0x01, 0x01))
+                    + _u16(28) + _u16(2400) + _u16(4000))
+        elif func == 0x43:
+            body = (bytes((0x1F, 0x09)) + _u16(m.vbus) + _u16(800 if m.vel else 300) + enc
+                    + _signed_pos(m.target if m.mode != 2 else m.pos) + _signed_vel(m.vel) + _signed_pos(m.actual)
+                    + _signed_pos(m.slip)
+                    + bytes((m.org_flags(), m.flags())))
+        else:
+            return bytes((a, 0x00, 0xEE))
+        return bytes((a, func)) + body
+
+def sim_streams(bus, poll_s=0.0005):  # asyncio (reader, writer) pair for AsyncDriver, call inside a running loop
+    import asyncio
+
+    reader = asyncio.StreamReader()
+
+    class _Writer:
+        def write(self, data):
+            bus.write(data)
+
+        def close(self):
+            pump.cancel()
+
+    async def _pump():
+        while True:
+            ready = bus.next_ready()
+            wait = poll_s if ready is None else max(0.0, ready - bus.clock())
+            await asyncio.sleep(wait)
+            data = bus.read()
+            if data:
+                reader.feed_data(data)
+
+    pump = asyncio.get_running_loop().create_task(_pump())
+    return reader, _Writer()
@@ -12,6 +12,80 @@ Origin Code from stepper motor manufacturer: https://pan.baidu.com/s/1HLKVfbbok9
 import time
 import struct
 
+try:  # MicroPython
+    from time import ticks_ms, ticks_us, ticks_diff, ticks_add, sleep_ms
+except ImportError:  # CPython host (simulator, benchmarks): emulate the ticks API
+    def ticks_ms():
+        return int(time.monotonic() * 1000)
+
+    def ticks_us():
+        return time.monotonic_ns() // 1000
+
+    def ticks_diff(a, b):
+        return a - b
+
+    def ticks_add(a, b):
+        return a + b
+
+    def sleep_ms(ms):
+        time.sleep(ms / 1000.0)
+
+# Checksum modes
+"""
+    The last byte of every frame is the check byte. Drivers ship with the
+    fixed 0x6B; they can be switched to XOR or CRC-8 over all preceding bytes,
+    which lets a noisy bus detect corruption. Set_Checksum() switches the
+    encoders and the receive parser together; the default fixed mode costs
+    one call returning a constant. Select the mode before building any
+    frames that are kept around (PollScheduler queries, planned trajectories).
+"""
+
+CHECK_6B = 0  # Fixed 0x6B
+CHECK_XOR = 1  # XOR of all preceding bytes
+CHECK_CRC8 = 2  # CRC-8, polynomial 0x07, init 0x00
+
+def _crc8_table(poly):
+    table = bytearray(256)
+    for i in range(256):
+        c = i
+        for _ in range(8):
+            c = ((c << 1) ^ poly) & 0xFF if c & 0x80 else (c << 1) & 0xFF
+        table[i] = c
+    return table
+
+CRC8_TABLE = _crc8_table(0x07)
+
+def _check_6b(buf, ofs, n):
+    return 0x6B
+
+def _check_xor(buf, ofs, n):
+    c = 0
+    for k in range(ofs, ofs + n):
+        c ^= buf[k]
+    return c
+
+def _check_crc8(buf, ofs, n):
+    c = 0
+    table = CRC8_TABLE
+    for k in range(ofs, ofs + n):
+        c = table[c ^ buf[k]]
+    return c
+
+_CHECKS = (_check_6b, _check_xor, _check_crc8)
+_check = _check_6b
+checksum_mode = CHECK_6B
+
+def Set_Checksum(mode):  # Select the check byte used by all encoders and the parser
+    global _check, checksum_mode
+    _check = _CHECKS[mode]
+    checksum_mode = mode
+
+def Checksum(buf, ofs, n):  # Check byte for the n bytes at buf[ofs] in the current mode
+    return _check(buf, ofs, n)
+
+def Check_Ok(buf, ofs, length):  # True if the frame of length bytes at buf[ofs] ends with a valid check byte
+    return buf[ofs + length - 1] == _check(buf, ofs, length - 1)
+
 # Lookup Table
 """
     S_VER = 0       # Read firmware version and corresponding hardware version
@@ -30,203 +104,807 @@ import struct
     S_ORG = 16      # Read homing/homing failure status flag
 """
 
-def Read_Sys_Params(addr, s):  # Read driver board parameters
-    i = 0
-    cmd = bytearray(16)
-    cmd[i] = addr
+# Function codes for Read_Sys_Params, built once at import instead of per call
+SYS_PARAM_CODES = {
+    "S_VER": 0x1F,
+    "S_RL": 0x20,
+    "S_PID": 0x21,
+    "S_VBUS": 0x24,
+    "S_CPHA": 0x27,
+    "S_ENCL": 0x31,
+    "S_TPOS": 0x33,
+    "S_VEL": 0x35,
+    "S_CPOS": 0x36,
+    "S_PERR": 0x37,
+    "S_FLAG": 0x3A,
+    "S_ORG": 0x3B,
+    "S_Conf": 0x42,  # Read driver parameters, an additional sub-code 0x6C is required
+    "S_State": 0x43,  # Read system status parameters, an additional sub-code 0x7A is required
+}
+
+# Sub-codes the drivers require after the function code
+SYS_PARAM_SUBCODES = {
+    "S_Conf": 0x6C,
+    "S_State": 0x7A,
+}
+
+# Command frame length (address and check byte included) per function code;
+# Read_Sys_Params queries are not listed and are 3 bytes, 4 with a sub-code
+COMMAND_LENGTHS = {
+    0x0A: 4,   # Reset_CurPos_To_Zero
+    0x0E: 4,   # Reset_Clog_Pro
+    0x46: 6,   # Modify_Ctrl_Mode
+    0x4C: 20,  # Origin_Modify_Params
+    0x93: 5,   # Origin_Set_O
+    0x9A: 5,   # Origin_Trigger_Return
+    0x9C: 4,   # Origin_Interrupt
+    0xF3: 6,   # En_Control
+    0xF6: 8,   # Vel_Control
+    0xFD: 13,  # Pos_Control
+    0xFE: 5,   # Stop_Now
+    0xFF: 4,   # Synchronous_motion
+}
+
+def Command_Length(buf, i, n):  # Length of the command frame starting at buf[i], 0 if not yet known
+    if n - i < 2:
+        return 0
+    func = buf[i + 1]
+    if func == 0x42 or func == 0x43:  # S_Conf / S_State, with or without sub-code
+        if n - i < 3:
+            return 0
+        return 4 if buf[i + 2] == 0x6C or buf[i + 2] == 0x7A else 3
+    return COMMAND_LENGTHS.get(func, 3)
+
+# Zero-copy encoders
+"""
+    Every *_Into function writes one frame into a caller-supplied bytearray or
+    memoryview starting at offset ofs and returns the number of bytes written,
+    in the style of struct.pack_into. A motion loop can keep one preallocated
+    buffer and send thousands of commands without touching the heap:
+
+        buf = bytearray(32)
+        mv = memoryview(buf)
+        n = Pos_Control_Into(buf, 0, 1, 0, 1000, 50, 3200, False, False)
+        uart.write(mv[:n])
+
+    The classic builders below (Pos_Control, Vel_Control, ...) are thin
+    wrappers that allocate an exactly sized bytearray and fill it in place.
+"""
+
+def Read_Sys_Params_Into(buf, ofs, addr, s):  # Read driver board parameters
+    i = ofs
+    buf[i] = addr
     i += 1
-    func_codes = {
-        "S_VER": 0x1F,
-        "S_RL": 0x20,
-        "S_PID": 0x21,
-        "S_VBUS": 0x24,
-        "S_CPHA": 0x27,
-        "S_ENCL": 0x31,
-        "S_TPOS": 0x33,
-        "S_VEL": 0x35,
-        "S_CPOS": 0x36,
-        "S_PERR": 0x37,
-        "S_FLAG": 0x3A,
-        "S_ORG": 0x3B,
-        "S_Conf": 0x42,  # Read driver parameters, an additional sub-code 0x6C is required
-        "S_State": 0x43,  # Read system status parameters, an additional sub-code 0x7A is required
-    }
-    if s in func_codes:
-        cmd[i] = func_codes[s]
+    code = SYS_PARAM_CODES.get(s)
+    if code is not None:
+        buf[i] = code
         i += 1
-    cmd[i] = 0x6B
+        sub = SYS_PARAM_SUBCODES.get(s)
+        if sub is not None:
+            buf[i] = sub  # Sub-code
+            i += 1
+    buf[i] = _check(buf, ofs, i - ofs)  # Check byte
     i += 1
-    return cmd[:i]
+    return i - ofs
+
+def Reset_CurPos_To_Zero_Into(buf, ofs, addr):  # Reset current position to zero
+    buf[ofs] = addr  # Address
+    buf[ofs + 1] = 0x0A  # Function code
+    buf[ofs + 2] = 0x6D  # Sub-code
+    buf[ofs + 3] = _check(buf, ofs, 3)  # Check byte
+    return 4
+
+def Reset_Clog_Pro_Into(buf, ofs, addr):  # Release stall protection
+    buf[ofs] = addr  # Address
+    buf[ofs + 1] = 0x0E  # Function code
+    buf[ofs + 2] = 0x52  # Sub-code
+    buf[ofs + 3] = _check(buf, ofs, 3)  # Check byte
+    return 4
+
+def Modify_Ctrl_Mode_Into(buf, ofs, addr, svF, ctrl_mode):  # Modify control mode
+    buf[ofs] = addr  # Address
+    buf[ofs + 1] = 0x46  # Function code
+    buf[ofs + 2] = 0x69  # Sub-code
+    buf[ofs + 3] = 0x01 if svF else 0x00  # Save flag, 1 = save, 0 = do not save
+    buf[ofs + 4] = ctrl_mode  # Control mode
+    buf[ofs + 5] = _check(buf, ofs, 5)  # Check byte
+    return 6
+
+def En_Control_Into(buf, ofs, addr, state, snF):  # Enable motor at address, and enable multi-motor sync
+    buf[ofs] = addr  # Address
+    buf[ofs + 1] = 0xF3  # Function code
+    buf[ofs + 2] = 0xAB  # Sub-code
+    buf[ofs + 3] = 0x01 if state else 0x00  # Enable state, true=0x01, false=0x00
+    buf[ofs + 4] = 0x01 if snF else 0x00  # Multi-motor sync flag, true=0x01, false=0x00
+    buf[ofs + 5] = _check(buf, ofs, 5)  # Check byte
+    return 6
+
+def Vel_Control_Into(buf, ofs, addr, dir, vel, acc, snF):  # Set speed/acceleration for motor
+    buf[ofs] = addr  # Address
+    buf[ofs + 1] = 0xF6  # Function code
+    buf[ofs + 2] = dir  # Direction, 0=CW, other=CCW
+    buf[ofs + 3] = (vel >> 8) & 0xFF  # Speed high byte (RPM)
+    buf[ofs + 4] = vel & 0xFF  # Speed low byte (RPM)
+    buf[ofs + 5] = acc  # Acceleration, note: 0 means start immediately
+    buf[ofs + 6] = 0x01 if snF else 0x00  # Multi-motor sync flag
+    buf[ofs + 7] = _check(buf, ofs, 7)  # Check byte
+    return 8
+
+def Pos_Control_Into(buf, ofs, addr, dir, vel, acc, clk, raF, snF):  # Position control for motor
+    buf[ofs] = addr  # Address
+    buf[ofs + 1] = 0xFD  # Function code
+    buf[ofs + 2] = dir  # Direction
+    buf[ofs + 3] = (vel >> 8) & 0xFF  # Speed high byte (RPM)
+    buf[ofs + 4] = vel & 0xFF  # Speed low byte (RPM)
+    buf[ofs + 5] = acc  # Acceleration, note: 0 means start immediately
+    buf[ofs + 6] = (clk >> 24) & 0xFF  # Pulse count (bit24-bit31)
+    buf[ofs + 7] = (clk >> 16) & 0xFF  # Pulse count (bit16-bit23)
+    buf[ofs + 8] = (clk >> 8) & 0xFF   # Pulse count (bit8-bit15)
+    buf[ofs + 9] = clk & 0xFF          # Pulse count (bit0-bit7)
+    buf[ofs + 10] = 0x01 if raF else 0x00  # Relative/absolute flag
+    buf[ofs + 11] = 0x01 if snF else 0x00  # Multi-motor sync flag
+    buf[ofs + 12] = _check(buf, ofs, 12)  # Check byte
+    return 13
+
+def Stop_Now_Into(buf, ofs, addr, snF):  # Immediately stop the motor
+    buf[ofs] = addr  # Address
+    buf[ofs + 1] = 0xFE  # Function code
+    buf[ofs + 2] = 0x98  # Sub-code
+    buf[ofs + 3] = 0x01 if snF else 0x00  # Multi-motor sync flag
+    buf[ofs + 4] = _check(buf, ofs, 4)  # Check byte
+    return 5
+
+def Synchronous_motion_Into(buf, ofs, addr):  # Execute synchronous motion command
+    buf[ofs] = addr  # Address
+    buf[ofs + 1] = 0xFF  # Function code
+    buf[ofs + 2] = 0x66  # Sub-code
+    buf[ofs + 3] = _check(buf, ofs, 3)  # Check byte
+    return 4
+
+def Origin_Set_O_Into(buf, ofs, addr, svF):  # Set homing zero-point position
+    buf[ofs] = addr  # Address
+    buf[ofs + 1] = 0x93  # Function code
+    buf[ofs + 2] = 0x88  # Sub-code
+    buf[ofs + 3] = 0x01 if svF else 0x00  # Save flag
+    buf[ofs + 4] = _check(buf, ofs, 4)  # Check byte
+    return 5
+
+def Origin_Modify_Params_Into(buf, ofs, addr, svF, o_mode, o_dir, o_vel, o_tm, sl_vel, sl_ma, sl_ms, potF):  # Modify homing parameters
+    buf[ofs] = addr  # Address
+    buf[ofs + 1] = 0x4C  # Function code
+    buf[ofs + 2] = 0xAE  # Sub-code
+    buf[ofs + 3] = 0x01 if svF else 0x00  # Save flag
+    buf[ofs + 4] = o_mode  # Homing mode
+    buf[ofs + 5] = o_dir  # Homing direction
+    buf[ofs + 6] = (o_vel >> 8) & 0xFF  # Homing speed high byte
+    buf[ofs + 7] = o_vel & 0xFF  # Homing speed low byte
+    buf[ofs + 8] = (o_tm >> 24) & 0xFF  # Homing timeout high byte
+    buf[ofs + 9] = (o_tm >> 16) & 0xFF  # Homing timeout mid-high byte
+    buf[ofs + 10] = (o_tm >> 8) & 0xFF  # Homing timeout mid-low byte
+    buf[ofs + 11] = o_tm & 0xFF  # Homing timeout low byte
+    buf[ofs + 12] = (sl_vel >> 8) & 0xFF  # Limit collision detection speed high byte
+    buf[ofs + 13] = sl_vel & 0xFF  # Limit collision detection speed low byte
+    buf[ofs + 14] = (sl_ma >> 8) & 0xFF  # Limit collision detection current high byte
+    buf[ofs + 15] = sl_ma & 0xFF  # Limit collision detection current low byte
+    buf[ofs + 16] = (sl_ms >> 8) & 0xFF  # Limit collision detection time high byte
+    buf[ofs + 17] = sl_ms & 0xFF  # Limit collision detection time low byte
+    buf[ofs + 18] = 0x01 if potF else 0x00  # Power-on auto homing flag
+    buf[ofs + 19] = _check(buf, ofs, 19)  # Check byte
+    return 20
+
+def Origin_Trigger_Return_Into(buf, ofs, addr, o_mode, snF):  # Trigger homing return
+    buf[ofs] = addr  # Address
+    buf[ofs + 1] = 0x9A  # Function code
+    buf[ofs + 2] = o_mode  # Homing mode
+    buf[ofs + 3] = 0x01 if snF else 0x00  # Multi-motor sync flag
+    buf[ofs + 4] = _check(buf, ofs, 4)  # Check byte
+    return 5
+
+def Origin_Interrupt_Into(buf, ofs, addr):  # Force interrupt homing
+    buf[ofs] = addr  # Address
+    buf[ofs + 1] = 0x9C  # Function code
+    buf[ofs + 2] = 0x48  # Sub-code
+    buf[ofs + 3] = _check(buf, ofs, 3)  # Check byte
+    return 4
+
+# Allocating builders, each returns a freshly allocated frame of exact length
+
+def Read_Sys_Params(addr, s):  # Read driver board parameters
+    cmd = bytearray((4 if s in SYS_PARAM_SUBCODES else 3) if s in SYS_PARAM_CODES else 2)
+    Read_Sys_Params_Into(cmd, 0, addr, s)
+    return cmd
 
 def Reset_CurPos_To_Zero(addr):  # Reset current position to zero
     cmd = bytearray(4)
-    cmd[0] = addr  # Address
-    cmd[1] = 0x0A  # Function code
-    cmd[2] = 0x6D  # Sub-code
-    cmd[3] = 0x6B  # Check byte
+    Reset_CurPos_To_Zero_Into(cmd, 0, addr)
     return cmd
 
 def Reset_Clog_Pro(addr):  # Release stall protection
     cmd = bytearray(4)
-    cmd[0] = addr  # Address
-    cmd[1] = 0x0E  # Function code
-    cmd[2] = 0x52  # Sub-code
-    cmd[3] = 0x6B  # Check byte
+    Reset_Clog_Pro_Into(cmd, 0, addr)
     return cmd
 
 def Modify_Ctrl_Mode(addr, svF, ctrl_mode):  # Modify control mode
     cmd = bytearray(6)
-    cmd[0] = addr  # Address
-    cmd[1] = 0x46  # Function code
-    cmd[2] = 0x69  # Sub-code
-    cmd[3] = 0x01 if svF else 0x00  # Save flag, 1 = save, 0 = do not save
-    cmd[4] = ctrl_mode  # Control mode
-    cmd[5] = 0x6B  # Check byte
+    Modify_Ctrl_Mode_Into(cmd, 0, addr, svF, ctrl_mode)
     return cmd
 
 def En_Control(addr, state, snF):  # Enable motor at address, and enable multi-motor sync
-    cmd = bytearray(16)
-    cmd[0] = addr  # Address
-    cmd[1] = 0xF3  # Function code
-    cmd[2] = 0xAB  # Sub-code
-    cmd[3] = 0x01 if state else 0x00  # Enable state, true=0x01, false=0x00
-    cmd[4] = 0x01 if snF else 0x00  # Multi-motor sync flag, true=0x01, false=0x00
-    cmd[5] = 0x6B  # Check byte
-    return cmd[:6]
+    cmd = bytearray(6)
+    En_Control_Into(cmd, 0, addr, state, snF)
+    return cmd
 
 def Vel_Control(addr, dir, vel, acc, snF):  # Set speed/acceleration for motor
-    cmd = bytearray(16)
-    cmd[0] = addr  # Address
-    cmd[1] = 0xF6  # Function code
-    cmd[2] = dir  # Direction, 0=CW, other=CCW
-    cmd[3] = (vel >> 8) & 0xFF  # Speed high byte (RPM)
-    cmd[4] = vel & 0xFF  # Speed low byte (RPM)
-    cmd[5] = acc  # Acceleration, note: 0 means start immediately
-    cmd[6] = 0x01 if snF else 0x00  # Multi-motor sync flag
-    cmd[7] = 0x6B  # Check byte
-    return cmd[:8]
+    cmd = bytearray(8)
+    Vel_Control_Into(cmd, 0, addr, dir, vel, acc, snF)
+    return cmd
 
 def Pos_Control(addr, dir, vel, acc, clk, raF, snF):  # Position control for motor
-    cmd = bytearray(16)
-    cmd[0] = addr  # Address
-    cmd[1] = 0xFD  # Function code
-    cmd[2] = dir  # Direction
-    cmd[3] = (vel >> 8) & 0xFF  # Speed high byte (RPM)
-    cmd[4] = vel & 0xFF  # Speed low byte (RPM)
-    cmd[5] = acc  # Acceleration, note: 0 means start immediately
-    cmd[6] = (clk >> 24) & 0xFF  # Pulse count (bit24-bit31)
-    cmd[7] = (clk >> 16) & 0xFF  # Pulse count (bit16-bit23)
-    cmd[8] = (clk >> 8) & 0xFF   # Pulse count (bit8-bit15)
-    cmd[9] = clk & 0xFF          # Pulse count (bit0-bit7)
-    cmd[10] = 0x01 if raF else 0x00  # Relative/absolute flag
-    cmd[11] = 0x01 if snF else 0x00  # Multi-motor sync flag
-    cmd[12] = 0x6B  # Check byte
-    return cmd[:13]
+    cmd = bytearray(13)
+    Pos_Control_Into(cmd, 0, addr, dir, vel, acc, clk, raF, snF)
+    return cmd
 
 def Stop_Now(addr, snF):  # Immediately stop the motor
     cmd = bytearray(5)
-    cmd[0] = addr  # Address
-    cmd[1] = 0xFE  # Function code
-    cmd[2] = 0x98  # Sub-code
-    cmd[3] = 0x01 if snF else 0x00  # Multi-motor sync flag
-    cmd[4] = 0x6B  # Check byte
+    Stop_Now_Into(cmd, 0, addr, snF)
     return cmd
 
 def Synchronous_motion(addr):  # Execute synchronous motion command
     cmd = bytearray(4)
-    cmd[0] = addr  # Address
-    cmd[1] = 0xFF  # Function code
-    cmd[2] = 0x66  # Sub-code
-    cmd[3] = 0x6B  # Check byte
+    Synchronous_motion_Into(cmd, 0, addr)
     return cmd
 
 def Origin_Set_O(addr, svF):  # Set homing zero-point position
     cmd = bytearray(5)
-    cmd[0] = addr  # Address
-    cmd[1] = 0x93  # Function code
-    cmd[2] = 0x88  # Sub-code
-    cmd[3] = 0x01 if svF else 0x00  # Save flag
-    cmd[4] = 0x6B  # Check byte
+    Origin_Set_O_Into(cmd, 0, addr, svF)
     return cmd
 
 def Origin_Modify_Params(addr, svF, o_mode, o_dir, o_vel, o_tm, sl_vel, sl_ma, sl_ms, potF):  # Modify homing parameters
     cmd = bytearray(20)
-    cmd[0] = addr  # Address
-    cmd[1] = 0x4C  # Function code
-    cmd[2] = 0xAE  # Sub-code
-    cmd[3] = 0x01 if svF else 0x00  # Save flag
-    cmd[4] = o_mode  # Homing mode
-    cmd[5] = o_dir  # Homing direction
-    cmd[6] = (o_vel >> 8) & 0xFF  # Homing speed high byte
-    cmd[7] = o_vel & 0xFF  # Homing speed low byte
-    cmd[8] = (o_tm >> 24) & 0xFF  # Homing timeout high byte
-    cmd[9] = (o_tm >> 16) & 0xFF  # Homing timeout mid-high byte
-    cmd[10] = (o_tm >> 8) & 0xFF  # Homing timeout mid-low byte
-    cmd[11] = o_tm & 0xFF  # Homing timeout low byte
-    cmd[12] = (sl_vel >> 8) & 0xFF  # Limit collision detection speed high byte
-    cmd[13] = sl_vel & 0xFF  # Limit collision detection speed low byte
-    cmd[14] = (sl_ma >> 8) & 0xFF  # Limit collision detection current high byte
-    cmd[15] = sl_ma & 0xFF  # Limit collision detection current low byte
-    cmd[16] = (sl_ms >> 8) & 0xFF  # Limit collision detection time high byte
-    cmd[17] = sl_ms & 0xFF  # Limit collision detection time low byte
-    cmd[18] = 0x01 if potF else 0x00  # Power-on auto homing flag
-    cmd[19] = 0x6B  # Check byte
+    Origin_Modify_Params_Into(cmd, 0, addr, svF, o_mode, o_dir, o_vel, o_tm, sl_vel, sl_ma, sl_ms, potF)
     return cmd
 
 def Origin_Trigger_Return(addr, o_mode, snF):  # Trigger homing return
     cmd = bytearray(5)
-    cmd[0] = addr  # Address
-    cmd[1] = 0x9A  # Function code
-    cmd[2] = o_mode  # Homing mode
-    cmd[3] = 0x01 if snF else 0x00  # Multi-motor sync flag
-    cmd[4] = 0x6B  # Check byte
+    Origin_Trigger_Return_Into(cmd, 0, addr, o_mode, snF)
     return cmd
 
 def Origin_Interrupt(addr):  # Force interrupt homing
     cmd = bytearray(4)
-    cmd[0] = addr  # Address
-    cmd[1] = 0x9C  # Function code
-    cmd[2] = 0x48  # Sub-code
-    cmd[3] = 0x6B  # Check byte
+    Origin_Interrupt_Into(cmd, 0, addr)
     return cmd
 
-def Receive_Data(uart):
-    i = 0
-    rxCmd = bytearray(128)
-    lTime = cTime = time.ticks_ms()
+# Precompiled constant frames
+"""
+    Reset_CurPos_To_Zero, Reset_Clog_Pro, Synchronous_motion, Origin_Interrupt
+    and every Read_Sys_Params query depend only on the address, so a
+    FrameTable builds them once per bus as immutable bytes. The hot path is a
+    list index plus uart.write, with no encoding and no allocation:
+
+        frames = FrameTable([1, 2, 3, 4, 5, 6])
+        uart.write(frames.query["S_CPOS"][addr])
+        uart.write(frames.sync[0])                # broadcast trigger, always built
+
+    Frames carry the check byte of the checksum mode active when the table is built.
+"""
+
+class FrameTable:
+    def __init__(self, addrs):
+        size = max(addrs) + 1
+        self.zero = [None] * size  # Reset_CurPos_To_Zero
+        self.clog = [None] * size  # Reset_Clog_Pro
+        self.sync = [None] * size  # Synchronous_motion
+        self.interrupt = [None] * size  # Origin_Interrupt
+        self.query = {s: [None] * size for s in SYS_PARAM_CODES}  # Read_Sys_Params, by parameter name
+        for addr in addrs:
+            self.zero[addr] = bytes(Reset_CurPos_To_Zero(addr))
+            self.clog[addr] = bytes(Reset_Clog_Pro(addr))
+            self.sync[addr] = bytes(Synchronous_motion(addr))
+            self.interrupt[addr] = bytes(Origin_Interrupt(addr))
+            for s, frames in self.query.items():
+                frames[addr] = bytes(Read_Sys_Params(addr, s))
+        # Broadcast (address 0) forms of the commands are always present; queries
+        # to address 0 get no reply and stay None
+        self.zero[0] = bytes(Reset_CurPos_To_Zero(0))
+        self.clog[0] = bytes(Reset_Clog_Pro(0))
+        self.sync[0] = bytes(Synchronous_motion(0))
+        self.interrupt[0] = bytes(Origin_Interrupt(0))
+
+# Batched multi-axis moves
+"""
+    Sync_Move encodes one snF-flagged Pos_Control frame per joint followed by a
+    broadcast Synchronous_motion into a single contiguous buffer and hands it
+    to the UART in one write, so every joint is buffered before the trigger
+    and all start on the same frame. Each move is (addr, target, vel, acc)
+    with target a signed pulse count; the sign selects the direction byte.
+    The per-joint acks stay in the receive buffer and are skipped by
+    Receive_Frame's function-code filter. Sync_Move_Length(n) sizes a buffer
+    for n joints; Sync_Move_Buffer swaps in a larger one only when needed.
+"""
+
+def Sync_Move_Length(n):  # Bytes Sync_Move_Into writes for n joints: one Pos_Control each plus the trigger
+    return 13 * n + 4
+
+def Sync_Move_Buffer(buf, n):  # buf if it holds a Sync_Move of n joints, else a new bytearray that does
+    need = Sync_Move_Length(n)
+    return buf if need <= len(buf) else bytearray(need)
+
+def Sync_Move_Into(buf, ofs, moves, raF=True, sync_addr=0):  # Encode all moves + trigger, return bytes written
+    i = ofs
+    for addr, target, vel, acc in moves:
+        i += Pos_Control_Into(buf, i, addr, 1 if target < 0 else 0, vel, acc, -target if target < 0 else target, raF, True)
+    i += Synchronous_motion_Into(buf, i, sync_addr)
+    return i - ofs
+
+_syncBuf = bytearray(Sync_Move_Length(8))  # Room for eight joints without allocating
+
+def Sync_Move(uart, moves, raF=True, sync_addr=0):  # Dispatch a synchronized multi-axis move in one write
+    buf = Sync_Move_Buffer(_syncBuf, len(moves))
+    n = Sync_Move_Into(buf, 0, moves, raF, sync_addr)
+    uart.write(memoryview(buf)[:n])
+    return n
+
+# Response frames
+"""
+    A response is addr, function code, payload, check byte (0x6B by default,
+    see Set_Checksum). Queries
+    return a fixed payload per function code; S_Conf and S_State carry their
+    total frame length in the third byte. Control commands are acknowledged
+    with addr, func, status, 0x6B (0x02 = ok, 0xE2 = condition not met) and
+    malformed commands with addr, 0x00, 0xEE, 0x6B.
+"""
+
+RESP_OK = 0x02  # Command accepted
+RESP_COND = 0xE2  # Command received but condition not met
+RESP_ERR = 0xEE  # Command format error
+
+# Total frame length (address and check byte included) per function code,
+# 0 means the length is carried in the frame itself. Anything else is a 4-byte ack.
+RESPONSE_LENGTHS = {
+    0x1F: 5,   # S_VER
+    0x20: 7,   # S_RL
+    0x21: 15,  # S_PID
+    0x24: 5,   # S_VBUS
+    0x27: 5,   # S_CPHA
+    0x31: 5,   # S_ENCL
+    0x33: 8,   # S_TPOS
+    0x35: 6,   # S_VEL
+    0x36: 8,   # S_CPOS
+    0x37: 8,   # S_PERR
+    0x3A: 4,   # S_FLAG
+    0x3B: 4,   # S_ORG
+    0x42: 0,   # S_Conf
+    0x43: 0,   # S_State
+}
+
+def _u16(buf, i):  # Big-endian uint16 at buf[i]
+    return (buf[i] << 8) | buf[i + 1]
+
+def _u32(buf, i):  # Big-endian uint32 at buf[i]
+    return (buf[i] << 24) | (buf[i + 1] << 16) | (buf[i + 2] << 8) | buf[i + 3]
+
+def _angle(buf, i):  # Sign byte + uint32 position, converted to degrees
+    deg = _u32(buf, i + 1) * 360.0 / 65536.0
+    return -deg if buf[i] else deg
+
+def _speed(buf, i):  # Sign byte + uint16 speed in RPM
+    rpm = _u16(buf, i + 1)
+    return -rpm if buf[i] else rpm
+
+def _deg(sign, raw):  # Sign byte + uint32 in 1/65536 rev, converted to degrees
+    deg = raw * 360.0 / 65536.0
+    return -deg if sign else deg
+
+try:
+    _Struct = struct.Struct
+except AttributeError:  # MicroPython has no Struct objects, keep the format string
+    class _Struct:
+        __slots__ = ("format",)
+
+        def __init__(self, fmt):
+            self.format = fmt
+
+        def unpack_from(self, buf, ofs=0):
+            return struct.unpack_from(self.format, buf, ofs)
+
+# S_FLAG bits
+FLAG_ENABLED = 0x01
+FLAG_REACHED = 0x02
+FLAG_STALL = 0x04
+FLAG_STALL_PROT = 0x08
+
+# S_ORG bits
+ORG_ENC_READY = 0x01
+ORG_CAL_READY = 0x02
+ORG_HOMING = 0x04
+ORG_HOME_FAILED = 0x08
+
+class _Record:  # Base for decoded multi-field replies
+    __slots__ = ()
+
+    def __repr__(self):
+        return "{}({})".format(type(self).__name__, ", ".join(
+            "{}={!r}".format(k, getattr(self, k)) for k in self.__slots__))
+
+class Version(_Record):  # S_VER
+    __slots__ = ("fw", "hw")
+    FMT = _Struct(">BB")
+
+    def __init__(self, buf, i):
+        self.fw, self.hw = self.FMT.unpack_from(buf, i)  # Firmware / hardware version
+
+class PhaseRL(_Record):  # S_RL
+    __slots__ = ("resistance", "inductance")
+    FMT = _Struct(">HH")
+
+    def __init__(self, buf, i):
+        self.resistance, self.inductance = self.FMT.unpack_from(buf, i)  # mOhm, uH
+
+class PID(_Record):  # S_PID
+    __slots__ = ("kp", "ki", "kd")
+    FMT = _Struct(">III")
+
+    def __init__(self, buf, i):
+        self.kp, self.ki, self.kd = self.FMT.unpack_from(buf, i)
+
+class Conf(_Record):  # S_Conf, driver configuration (21 parameters)
+    __slots__ = ("motor_type", "pulse_mode", "comm_mode", "en_level", "dir_level", "microstep", "interp",
+                 "screen_off", "open_ma", "closed_ma", "max_rpm", "cur_bw", "baud", "can_rate", "id_addr",
+                 "checksum", "response", "stall_protect", "stall_rpm", "stall_ma", "stall_ms")
+    FMT = _Struct(">BBBBBBBBHHHHBBBBBBHHH")
+
+    def __init__(self, buf, i):  # i = payload offset, fields follow the byte and parameter counts
+        (self.motor_type, self.pulse_mode, self.comm_mode, self.en_level, self.dir_level, self.microstep,
+         self.interp, self.screen_off, self.open_ma, self.closed_ma, self.max_rpm, self.cur_bw, self.baud,
+         self.can_rate, self.id_addr, self.checksum, self.response, self.stall_protect, self.stall_rpm,
+         self.stall_ma, self.stall_ms) = self.FMT.unpack_from(buf, i + 2)
+
+class State(_Record):  # S_State: all live status of one motor in a single frame
+    __slots__ = ("vbus", "cpha", "encl", "tpos", "vel", "cpos", "perr", "ready", "flags")
+    FMT = _Struct(">HHHBIBHBIBIBB")
+
+    def __init__(self, buf=None, i=0):  # i = payload offset, fields follow the byte and parameter counts
+        if buf is None:  # Empty record, filled field by field by Read_State's fallback
+            for k in self.__slots__:
+                setattr(self, k, None)
+            return
+        (self.vbus,  # Bus voltage, mV
+         self.cpha,  # Phase current, mA
+         self.encl,  # Calibrated encoder value
+         ts, tp, vs, v, cs, cp, es, ep,
+         self.ready,  # Encoder/calibration/homing flags, as S_ORG
+         self.flags,  # Enable/reached/stall flags, as S_FLAG
+         ) = self.FMT.unpack_from(buf, i + 2)
+        self.tpos = _deg(ts, tp)  # Target position, degrees
+        self.vel = -v if vs else v  # Real-time speed, RPM
+        self.cpos = _deg(cs, cp)  # Real-time position, degrees
+        self.perr = _deg(es, ep)  # Position error, degrees
+
+def _byte(buf, i):
+    return buf[i]
+
+# Decoder registry: function code -> decoder(buf, payload offset). Single-value
+# replies decode to plain numbers with shifts (no allocation), multi-field
+# replies to the __slots__ records above.
+DECODERS = {
+    0x1F: Version,  # S_VER
+    0x20: PhaseRL,  # S_RL
+    0x21: PID,      # S_PID
+    0x24: _u16,     # S_VBUS, bus voltage in mV
+    0x27: _u16,     # S_CPHA, phase current in mA
+    0x31: _u16,     # S_ENCL, calibrated encoder value
+    0x33: _angle,   # S_TPOS, target position in degrees
+    0x35: _speed,   # S_VEL, real-time speed in RPM
+    0x36: _angle,   # S_CPOS, real-time position in degrees
+    0x37: _angle,   # S_PERR, position error in degrees
+    0x3A: _byte,    # S_FLAG, FLAG_* bits
+    0x3B: _byte,    # S_ORG, ORG_* bits
+    0x42: Conf,     # S_Conf
+    0x43: State,    # S_State
+}
+
+# Frame length the decoder expects for replies that carry their own length
+DECODED_LENGTHS = {
+    0x42: 33,  # S_Conf with 21 parameters
+    0x43: 31,  # S_State with 9 parameters
+}
+
+def Decode(s, buf, i):  # Decode the payload of a Read_Sys_Params reply by parameter name
+    return DECODERS[SYS_PARAM_CODES[s]](buf, i)
+
+class Frame:  # Parsed response frame
+    __slots__ = ("addr", "func", "data", "value")
+
+    def __init__(self, addr, func, data, value):
+        self.addr = addr  # Motor address
+        self.func = func  # Function code echoed by the driver
+        self.data = data  # Raw payload (memoryview into the receive buffer)
+        self.value = value  # Decoded payload, status byte for acks, None if unknown
+
+    def __repr__(self):
+        return "Frame(addr={}, func=0x{:02X}, value={!r})".format(self.addr, self.func, self.value)
+
+MAX_FRAME_LEN = 64  # Longest plausible response; S_Conf is 33 bytes
+
+def Frame_Length(buf, i, n):  # Expected length of the frame starting at buf[i], 0 if not yet known, -1 if impossible
+    if n - i < 2:
+        return 0
+    length = RESPONSE_LENGTHS.get(buf[i + 1], 4)
+    if length == 0:
+        if n - i < 3:
+            return 0
+        length = buf[i + 2]
+        if length < 4 or length > MAX_FRAME_LEN:  # Corrupt length byte, buf[i] is not a frame boundary
+            return -1
+    return length
+
+def Parse_Frame(buf, n=-1, ofs=0):  # Parse one response frame from raw bytes, None if incomplete/invalid
+    if n < 0:
+        n = len(buf)
+    while ofs < n and buf[ofs] == 0x00:  # Skip line noise before the address byte
+        ofs += 1
+    length = Frame_Length(buf, ofs, n)
+    if length < 3 or ofs + length > n or not Check_Ok(buf, ofs, length):
+        return None
+    func = buf[ofs + 1]
+    decoder = DECODERS.get(func)
+    if decoder is not None and length == (RESPONSE_LENGTHS[func] or DECODED_LENGTHS.get(func)):
+        value = decoder(buf, ofs + 2)
+    elif length == 4:
+        value = buf[ofs + 2]
+    else:
+        value = None
+    return Frame(buf[ofs], func, memoryview(buf)[ofs + 2:ofs + length - 1], value)
+
+class RxRing:  # Preallocated receive ring buffer filled with uart.readinto
+    # Single producer, single consumer: only fill()/write() move head and only
+    # the readers move tail, so fill() may run from a UART IRQ handler while the
+    # main loop extracts frames. One slot stays empty to tell full from empty.
+    def __init__(self, size=256):
+        self.buf = bytearray(size)
+        self.mv = memoryview(self.buf)
+        self.size = size
+        self.head = 0  # Next write index
+        self.tail = 0  # Next read index
+
+    @property
+    def count(self):  # Bytes buffered
+        return (self.head - self.tail) % self.size
+
+    def free(self):  # Bytes that can still be written
+        return self.size - 1 - self.count
+
+    def fill(self, uart):  # Drain everything uart.any() reports, return bytes added
+        n = min(uart.any(), self.free())
+        added = 0
+        head = self.head
+        while n > 0:
+            chunk = min(n, self.size - head)  # Contiguous space up to the wrap point
+            got = uart.readinto(self.mv[head:head + chunk]) or 0
+            if not got:
+                break
+            head = (head + got) % self.size
+            self.head = head  # Publish only after the bytes are in place
+            added += got
+            n -= got
+        return added
+
+    def write(self, data):  # Append bytes from a stream read, return bytes stored (excess is dropped)
+        n = min(len(data), self.free())
+        head = self.head
+        first = min(n, self.size - head)
+        self.mv[head:head + first] = data[:first]
+        if n > first:
+            self.mv[:n - first] = data[first:n]
+        self.head = (head + n) % self.size
+        return n
+
+    def __getitem__(self, i):  # Byte i positions after the read index, without consuming
+        return self.buf[(self.tail + i) % self.size]
+
+    def read_into(self, dst, n):  # Move n buffered bytes into dst, return count moved
+        n = min(n, self.count, len(dst))
+        first = min(n, self.size - self.tail)
+        dst[:first] = self.mv[self.tail:self.tail + first]
+        if n > first:
+            dst[first:n] = self.mv[:n - first]
+        self.discard(n)
+        return n
+
+    def discard(self, n):  # Drop n buffered bytes
+        n = min(n, self.count)
+        self.tail = (self.tail + n) % self.size
+
+    def clear(self):  # Drop everything buffered (consumer side)
+        self.tail = self.head
+
+# Bus statistics sink (utils/busStats.BusStats), None when not instrumented
+stats = None
+
+def Attach_Stats(sink):  # Report received frames, timeouts and check failures to sink, None to detach
+    global stats
+    stats = sink
+
+_rxRing = RxRing()
+_rxBuf = bytearray(128)
+_txBuf = bytearray(4)
+
+def Receive_Bytes(uart, buf, ring=_rxRing):  # Read into buf until the line is idle, return byte count
+    lTime = cTime = ticks_ms()
     while True:
-        if uart.any():
-            if i < 128:
-                rxCmd[i] = uart.read(1)[0]
-                i += 1
-                lTime = time.ticks_ms()
+        if ring.fill(uart):
+            lTime = ticks_ms()
         else:
-            cTime = time.ticks_ms()
-            if time.ticks_diff(cTime, lTime) > 100:
-                hex_data = " ".join(["{:02x}".format(b) for b in rxCmd[:i]])  # Convert to hex string with leading zeros
-                hex_data = hex_data.strip("00 ")  # Remove invalid leading/trailing zeros
-                if hex_data and hex_data[0] != "0":  # Ensure first character is not 0
-                    hex_data = "0" + hex_data
-                return hex_data, len(hex_data.replace(" ", "")) // 2  # Return data and data length
-
-def Real_time_location(uart):
-    # Define real-time position variable
-    pos = 0.0
-    Motor_Cur_Pos = 0.0
-    # Read real-time motor position
-    Read_Sys_Params(1, "S_CPOS")
-    time.sleep_ms(1)
-    # Command data is cached in data array, length is count
-    data, count = Receive_Data(uart)
-    data_hex = data.split()
-    if count > 0 and data and int(data_hex[0], 16) == 0x01 and int(data_hex[1], 16) == 0x36:
-        # Combine into uint32_t
-        pos = struct.unpack(">I", bytes.fromhex("".join(data_hex[3:7])))[0]
-        # Angle conversion
-        Motor_Cur_Pos = float(pos) * 360.0 / 65536.0
-        if int(data_hex[2], 16):
-            Motor_Cur_Pos = -Motor_Cur_Pos
-    else:
-        pass
-    print('Motor1: {:.1f}'.format(Motor_Cur_Pos))  # Print float value with 1 decimal place
-    time.sleep_ms(1)
+            cTime = ticks_ms()
+            if ticks_diff(cTime, lTime) > 100:
+                return ring.read_into(buf, ring.count)
+
+def Extract_Frame(ring, buf=_rxBuf):  # Pop the next complete frame from ring, None if none buffered yet
+    resync = False
+    while ring.count:
+        if ring[0] == 0x00:  # Line noise before the address byte
+            ring.discard(1)
+            continue
+        length = Frame_Length(ring, 0, ring.count)
+        if length == 0 or ring.count < length:
+            return None  # Wait for the rest of the frame
+        if length < 3 or length > len(buf) or not Check_Ok(ring, 0, length):  # -1: corrupt length byte
+            if stats is not None and not resync and 3 <= length <= len(buf):
+                stats.check_errors += 1  # Count the bad frame once, not every byte skipped while resyncing
+            resync = True
+            ring.discard(1)  # Not a frame boundary, resync on the next byte
+            continue
+        ring.read_into(buf, length)
+        frame = Parse_Frame(buf, length)
+        if stats is not None and frame is not None:
+            stats.received(frame)
+        return frame
+    return None
+
+def Receive_Frame(uart, func=None, timeout_ms=100, buf=_rxBuf, ring=_rxRing):  # Receive one response frame
+    # Returns as soon as a complete frame is buffered instead of waiting for the
+    # line to go idle; timeout_ms of silence is only the fallback for lost replies.
+    # With func set, stale frames for other function codes are dropped (error
+    # frames with func 0x00 are always returned).
+    lTime = ticks_ms()
+    while True:
+        if ring.fill(uart):
+            lTime = ticks_ms()
+        frame = Extract_Frame(ring, buf)
+        while frame is not None:
+            if func is None or frame.func == func or frame.func == 0x00:
+                return frame
+            frame = Extract_Frame(ring, buf)
+        if ticks_diff(ticks_ms(), lTime) > timeout_ms:
+            if stats is not None:
+                stats.timed_out(func)
+            return None
+
+def Receive_Data(uart):  # Legacy hex-string receive, prefer Receive_Frame
+    rxCmd = bytearray(128)
+    i = Receive_Bytes(uart, rxCmd)
+    hex_data = " ".join(["{:02x}".format(b) for b in rxCmd[:i]])  # Convert to hex string with leading zeros
+    hex_data = hex_data.strip("00 ")  # Remove invalid leading/trailing zeros
+    if hex_data and hex_data[0] != "0":  # Ensure first character is not 0
+        hex_data = "0" + hex_data
+    return hex_data, len(hex_data.replace(" ", "")) // 2  # Return data and data length
+
+def Query_Frame(uart, addr, s, timeout_ms=100, buf=_rxBuf, ring=_rxRing, tx=_txBuf):  # Reply Frame to a Read_Sys_Params query, None on timeout
+    # The frame's func is 0x00 when the driver rejected the query. Pass
+    # per-bus buf/ring/tx to query several UARTs from different threads.
+    func = SYS_PARAM_CODES[s]
+    n = Read_Sys_Params_Into(tx, 0, addr, s)
+    uart.write(memoryview(tx)[:n])  # A view, slicing the bytearray would copy it
+    while True:
+        frame = Receive_Frame(uart, func, timeout_ms, buf, ring)
+        if frame is None or frame.addr == addr:
+            return frame
+
+def Query(uart, addr, s, timeout_ms=100, buf=_rxBuf, ring=_rxRing, tx=_txBuf):  # Send a Read_Sys_Params query and return the decoded reply, None on timeout
+    frame = Query_Frame(uart, addr, s, timeout_ms, buf, ring, tx)
+    if frame is None or frame.func != SYS_PARAM_CODES[s]:
+        return None  # func 0x00 is a format error reply
+    return frame.value
+
+def Real_time_location(uart, addr=1, timeout_ms=100):  # Real-time position of motor addr in degrees, None on timeout
+    return Query(uart, addr, "S_CPOS", timeout_ms)
+
+# Individual reads that make up a State, for firmware without S_State. S_CPOS
+# comes first: if it goes unanswered the motor is unreachable.
+STATE_FIELDS = (
+    ("cpos", "S_CPOS"),
+    ("vel", "S_VEL"),
+    ("flags", "S_FLAG"),
+    ("tpos", "S_TPOS"),
+    ("perr", "S_PERR"),
+    ("vbus", "S_VBUS"),
+    ("cpha", "S_CPHA"),
+    ("encl", "S_ENCL"),
+    ("ready", "S_ORG"),
+)
+
+def State_Reply(frame):  # Outcome of an S_State query: the State, None on timeout, False if the firmware rejected it
+    if frame is None:
+        return None
+    if frame.func == SYS_PARAM_CODES["S_State"]:
+        return frame.value
+    return False  # addr, 0x00, 0xEE: this firmware has no S_State
+
+def Assemble_State(values):  # State from per-field values in STATE_FIELDS order, None if S_CPOS went unanswered
+    if not values or values[0] is None:
+        return None
+    state = State()
+    for k in range(len(STATE_FIELDS)):
+        setattr(state, STATE_FIELDS[k][0], values[k] if k < len(values) else None)
+    return state
+
+_noState = set()  # Addresses whose firmware rejected S_State
+
+def Read_State(uart, addr, timeout_ms=100):  # Full motor state as a State record in one round trip, None if unreachable
+    # Only an explicit rejection switches the address to per-field reads for
+    # good; a lost S_State reply just returns None like any other query.
+    if addr not in _noState:
+        state = State_Reply(Query_Frame(uart, addr, "S_State", timeout_ms))
+        if state is not False:
+            return state
+        _noState.add(addr)
+    values = []
+    for field, s in STATE_FIELDS:
+        value = Query(uart, addr, s, timeout_ms)
+        if value is None and not values:
+            return None
+        values.append(value)
+    return Assemble_State(values)
+
+class Telemetry:  # Non-blocking query/response for one UART, driven by poll() from the control loop
+    def __init__(self, uart, timeout_ms=100):
+        self.uart = uart
+        self.timeout_ms = timeout_ms
+        self.ring = RxRing()
+        self.buf = bytearray(64)
+        self.tx = bytearray(4)
+        self._txView = memoryview(self.tx)  # Written in slices, no copy per query
+        self.addr = 0
+        self.func = 0
+        self.value = None  # Decoded reply of the last completed request, None on timeout
+        self.busy = False  # A request is in flight
+        self.callback = None
+        self.sTime = 0
+
+    def request(self, addr, s="S_CPOS", callback=None):  # Send a query without waiting; callback(addr, value) on completion
+        n = Read_Sys_Params_Into(self.tx, 0, addr, s)
+        self.uart.write(self._txView[:n])
+        self.addr = addr
+        self.func = SYS_PARAM_CODES[s]
+        self.callback = callback
+        self.value = None
+        self.busy = True
+        self.sTime = ticks_ms()
+
+    def poll(self):  # Process received bytes, True once the pending request completed or timed out
+        if not self.busy:
+            return False
+        self.ring.fill(self.uart)
+        frame = Extract_Frame(self.ring, self.buf)
+        while frame is not None:
+            if frame.addr == self.addr and (frame.func == self.func or frame.func == 0x00):
+                return self._finish(frame.value if frame.func == self.func else None)
+            frame = Extract_Frame(self.ring, self.buf)
+        if ticks_diff(ticks_ms(), self.sTime) > self.timeout_ms:
+            if stats is not None:
+                stats.timed_out(self.func)
+            return self._finish(None)
+        return False
+
+    def _finish(self, value):
+        self.value = value
+        self.busy = False
+        if self.callback is not None:
+            self.callback(self.addr, value)
+        return True
+
+    def read(self, addr, s="S_CPOS"):  # Blocking convenience wrapper
+        self.request(addr, s)
+        while not self.poll():
+            pass
+        return self.value
@@ -0,0 +1,100 @@
+"""
+Multi-Motor Telemetry Poller for the Open-APEX Project
+---------------------------------
+Polls Read_Sys_Params queries (S_CPOS, S_VEL, S_FLAG, ...) for every motor on
+one UART at a fixed rate. Queries run through a Correlator, which matches
+responses by address and function code and paces them (one motor on the
+line at a time by default, up to depth queries when depth is given), and
+each cycle is published as one consistent Snapshot.
+
+    poller = PollScheduler(uart, [1, 2, 3, 4, 5, 6], rate_hz=50)
+    poller.run(lambda snap: print(snap.seq, snap.values[0]))
+"""
+
+from utils.stepperMotorControl import FrameTable, ticks_ms, ticks_diff, ticks_add, sleep_ms
+from utils.correlator import Correlator
+
+class Snapshot:  # One complete polling cycle
+    __slots__ = ("seq", "stamp", "values")
+
+    def __init__(self, n_addrs, n_params):
+        self.seq = 0  # Cycle number
+        self.stamp = 0  # ticks_ms() when the cycle started
+        self.values = [[None] * n_params for _ in range(n_addrs)]  # values[k][j], None if dropped
+
+class PollScheduler:
+    def __init__(self, uart, addrs, params=("S_CPOS", "S_VEL", "S_FLAG"), rate_hz=50, timeout_ms=10, depth=None):
+        self.uart = uart
+        self.addrs = list(addrs)
+        self.params = list(params)
+        self.period_ms = max(1, 1000 // rate_hz)
+        self.timeout_ms = timeout_ms  # Give up on a query this long after it was written
+        self.depth = depth  # Max queries in flight across motors, None: one motor at a time
+        # Query frames come from a FrameTable built once, with one store callback each
+        table = FrameTable(self.addrs)
+        self._queries = []
+        self._store = []
+        for k, addr in enumerate(self.addrs):
+            for j, p in enumerate(self.params):
+                self._queries.append(table.query[p][addr])
+                self._store.append(self._storer(k, j))
+        self.cor = Correlator(uart, len(self._queries), timeout_ms, depth)
+        self.snapshot = Snapshot(len(self.addrs), len(self.params))  # Last published cycle
+        self._work = Snapshot(len(self.addrs), len(self.params))
+        self.cycles = 0
+        self.dropped = 0  # Queries that timed out without a reply
+        self.overruns = 0  # Cycles that took longer than the period
+        self.achieved_hz = 0.0
+        self._last = None
+
+    def poll_once(self):  # Run one polling cycle and publish its snapshot
+        work = self._work
+        for row in work.values:
+            for j in range(len(row)):
+                row[j] = None
+        work.stamp = start = ticks_ms()
+        cor = self.cor
+        timeouts = cor.timeouts
+        for q in range(len(self._queries)):
+            cor.queue(self._queries[q], None, self._store[q])
+        cor.flush()
+        while cor.pending:
+            cor.poll()
+        self.dropped += cor.timeouts - timeouts
+        # Publish: swap buffers so readers always see a complete cycle
+        self.cycles += 1
+        work.seq = self.cycles
+        self._work = self.snapshot
+        self.snapshot = work
+        if self._last is not None:
+            dt = ticks_diff(start, self._last)
+            if dt > 0:
+                hz = 1000.0 / dt
+                self.achieved_hz = hz if not self.achieved_hz else self.achieved_hz + (hz - self.achieved_hz) * 0.1  # Smoothed rate
+        self._last = start
+        return work
+
+    def _storer(self, k, j):  # Correlator callback filling values[k][j] of the cycle in progress
+        def store(addr, func, value):
+            self._work.values[k][j] = value
+        return store
+
+    def run(self, callback=None, cycles=0):  # Poll at the target rate, forever if cycles is 0
+        deadline = ticks_ms()
+        count = 0
+        while not cycles or count < cycles:
+            snap = self.poll_once()
+            if callback is not None:
+                callback(snap)
+            count += 1
+            deadline = ticks_add(deadline, self.period_ms)
+            wait = ticks_diff(deadline, ticks_ms())
+            if wait > 0:
+                sleep_ms(wait)
+            else:
+                self.overruns += 1
+                deadline = ticks_ms()
+
+    def report(self):  # One-line status for periodic logging
+        return "cycles={} rate={:.1f}Hz target={:.1f}Hz dropped={} overruns={}".format(
+            self.cycles, self.achieved_hz, 1000.0 / self.period_ms, self.dropped, self.overruns)
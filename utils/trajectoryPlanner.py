@@ -0,0 +1,146 @@
+"""
+Trajectory Planner for the Open-APEX Project
+---------------------------------
+Turns a list of joint waypoints (motor shaft degrees, one value per joint)
+into time-synchronized trapezoidal or S-curve segments and precomputes the
+Pos_Control frames that execute them, so the real-time loop only streams
+bytes:
+
+    planner = TrajectoryPlanner([1, 2, 3], max_rpm=600, max_acc=2000)
+    segments = planner.plan([[0, 0, 0], [90, -45, 180], [0, 0, 0]])
+    Play(uart, planner.frames_segments(segments))     # driver-side ramps, trapezoid
+    Play(uart, planner.frames_stream(segments, 10))   # host-sampled setpoints, any profile
+
+All joints share one normalized time profile per segment, so they start
+and finish together. Limits are per joint: max_rpm in RPM, max_acc in
+RPM/s (scalars apply to every joint).
+"""
+
+import math
+from utils.stepperMotorControl import Sync_Move_Into, Sync_Move_Length, ticks_ms, ticks_diff, ticks_add, sleep_ms
+
+TRAPEZOID = 0
+S_CURVE = 1  # Smoothstep velocity ramps, 1.5x the trapezoid's peak acceleration
+
+def Acc_Code(rpm_per_s):  # ZDT acc byte for an acceleration: each 1 RPM step takes (256 - acc) x 50 us
+    if rpm_per_s <= 0:
+        return 0  # Start immediately
+    acc = 256 - 1.0 / (rpm_per_s * 50e-6)
+    return max(1, min(255, int(acc + 0.5)))
+
+class Segment:  # One synchronized move between two waypoints
+    __slots__ = ("t0", "duration", "ta", "start", "delta", "shape")
+
+    def __init__(self, t0, duration, ta, start, delta, shape):
+        self.t0 = t0  # Start time in seconds from the beginning of the path
+        self.duration = duration  # Seconds
+        self.ta = ta  # Acceleration (and deceleration) time in seconds
+        self.start = start  # Joint angles at the start, degrees
+        self.delta = delta  # Joint displacement, degrees
+        self.shape = shape  # TRAPEZOID or S_CURVE
+
+    def progress(self, t):  # Normalized position 0..1 at time t into the segment
+        T, ta = self.duration, self.ta
+        if t <= 0:
+            return 0.0
+        if t >= T:
+            return 1.0
+        if t > T - ta:
+            return 1.0 - self.progress(T - t)  # Deceleration mirrors acceleration
+        vpeak = 1.0 / (T - ta)
+        if t >= ta:
+            return vpeak * (ta * 0.5 + t - ta)
+        if self.shape == S_CURVE:
+            x = t / ta
+            return vpeak * ta * (x * x * x - x * x * x * x * 0.5)
+        return vpeak * t * t / (2.0 * ta)
+
+    def position(self, t):  # Joint angles at time t into the segment
+        s = self.progress(t)
+        return [a + d * s for a, d in zip(self.start, self.delta)]
+
+class TrajectoryPlanner:
+    def __init__(self, addrs, max_rpm=300, max_acc=1000, pulses_per_rev=3200, shape=TRAPEZOID, accel_frac=0.25):
+        n = len(addrs)
+        self.addrs = list(addrs)
+        self.max_rpm = list(max_rpm) if isinstance(max_rpm, (list, tuple)) else [max_rpm] * n
+        self.max_acc = list(max_acc) if isinstance(max_acc, (list, tuple)) else [max_acc] * n
+        self.pulses_per_rev = pulses_per_rev
+        self.shape = shape
+        self.accel_frac = min(0.5, max(0.01, accel_frac))  # Share of each segment spent accelerating
+
+    def _duration(self, delta):  # Shortest segment time that keeps every joint within its limits
+        f = self.accel_frac
+        k = 1.5 if self.shape == S_CURVE else 1.0
+        T = 0.001
+        for d, rpm, acc in zip(delta, self.max_rpm, self.max_acc):
+            d = abs(d)
+            if not d:
+                continue
+            v = rpm * 6.0  # deg/s
+            a = acc * 6.0  # deg/s^2
+            T = max(T, d / (v * (1.0 - f)), math.sqrt(k * d / (a * f * (1.0 - f))))
+        return T
+
+    def plan(self, waypoints):  # List of Segments visiting every waypoint
+        segments = []
+        t = 0.0
+        for p0, p1 in zip(waypoints, waypoints[1:]):
+            delta = [b - a for a, b in zip(p0, p1)]
+            T = self._duration(delta)
+            segments.append(Segment(t, T, T * self.accel_frac, list(p0), delta, self.shape))
+            t += T
+        return segments
+
+    def _pulses(self, deg):
+        return int(round(deg * self.pulses_per_rev / 360.0))
+
+    def frames_segments(self, segments):  # One Sync_Move per segment, ramps executed by the drivers
+        frames = []
+        for seg in segments:
+            moves = []
+            cruise = seg.duration - seg.ta
+            for addr, a, d in zip(self.addrs, seg.start, seg.delta):
+                rpm = abs(d) / cruise / 6.0
+                acc = rpm / seg.ta if seg.ta else 0
+                moves.append((addr, self._pulses(a + d), max(1, int(rpm + 0.5)), Acc_Code(acc)))
+            frames.append((int(seg.t0 * 1000), self._encode(moves)))
+        return frames
+
+    def frames_stream(self, segments, dt_ms=10):  # Absolute setpoints sampled every dt_ms, any profile
+        frames = []
+        if not segments:
+            return frames
+        dt = dt_ms / 1000.0
+        end = segments[-1].t0 + segments[-1].duration
+        prev = [self._pulses(a) for a in segments[0].start]
+        k = 0
+        t = 0.0
+        while t < end:
+            t_prev = t
+            t = min(end, t + dt)
+            h = t - t_prev
+            while k < len(segments) - 1 and t > segments[k].t0 + segments[k].duration:
+                k += 1
+            seg = segments[k]
+            target = [self._pulses(p) for p in seg.position(t - seg.t0)]
+            moves = []
+            for addr, p0, p1 in zip(self.addrs, prev, target):
+                rpm = abs(p1 - p0) * 60.0 / (self.pulses_per_rev * h)  # Speed that covers the step in time
+                moves.append((addr, p1, max(1, int(rpm + 0.999)), 0))
+            frames.append((int(t_prev * 1000 + 0.5), self._encode(moves)))
+            prev = target
+        return frames
+
+    def _encode(self, moves):
+        buf = bytearray(Sync_Move_Length(len(moves)))
+        Sync_Move_Into(buf, 0, moves)
+        return bytes(buf)
+
+def Play(uart, frames):  # Stream precomputed (t_ms, frame) pairs at their scheduled times
+    t0 = ticks_ms()
+    for t_ms, frame in frames:
+        wait = ticks_diff(ticks_add(t0, t_ms), ticks_ms())
+        if wait > 0:
+            sleep_ms(wait)
+        uart.write(frame)
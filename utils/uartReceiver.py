@@ -0,0 +1,142 @@
+"""
+Interrupt-Driven UART Receiver for the Open-APEX Project
+---------------------------------
+Receives response frames without busy-polling uart.any(). Bytes land in a
+preallocated RxRing from the UART RX interrupt (or from a uasyncio stream
+task on ports without uart.irq), and complete frames are signalled so the
+main loop can plan trajectories while a reply is still on the wire.
+
+    rx = IrqReceiver(uart)                  # installs the RX-idle IRQ handler
+    uart.write(Read_Sys_Params(1, "S_CPOS"))
+    ...                                     # main loop keeps working
+    frame = rx.get()                        # non-blocking, None until a frame is complete
+    frame = await rx.frame(0x36, 20)        # or wait for it from a uasyncio task
+
+    rx = StreamReceiver(asyncio.StreamReader(uart))    # ports without uart.irq
+    frame = await rx.frame()
+
+The IRQ handler only fills the ring and sets a flag; frames are decoded by
+the consumer (get()/frame()). Pass callback= to decode inside the handler
+instead (soft IRQ context, so the callback may allocate but must be short).
+"""
+
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+
+try:
+    from machine import UART
+except ImportError:
+    UART = None  # Host: pass trigger explicitly or use StreamReceiver
+
+from utils.stepperMotorControl import RxRing, Extract_Frame, Frame_Length
+
+_Flag = getattr(asyncio, "ThreadSafeFlag", None) or asyncio.Event  # Event is enough for host-side use
+
+def _wait_for_ms(aw, ms):  # uasyncio has wait_for_ms, CPython only wait_for(seconds)
+    if hasattr(asyncio, "wait_for_ms"):
+        return asyncio.wait_for_ms(aw, ms)
+    return asyncio.wait_for(aw, ms / 1000)
+
+def _frame_ready(ring):  # True if the ring starts with a complete frame (leading noise counts as ready)
+    n = ring.count
+    if not n:
+        return False
+    if ring[0] == 0x00:
+        return True  # Let Extract_Frame drop it
+    length = Frame_Length(ring, 0, n)
+    return length < 0 or (length != 0 and n >= length)  # A corrupt length byte also needs the consumer to resync
+
+class _Receiver:  # Shared consumer side: frame extraction and filtering by function code
+    def __init__(self, size):
+        self.ring = RxRing(size)
+        self.buf = bytearray(128)  # Frame scratch, reused by every returned Frame
+        self.flag = _Flag()
+        self.overruns = 0  # Fills that found the ring full
+
+    def get(self, func=None, addr=None):  # Next complete frame, None if none buffered yet
+        # With func set, stale frames for other function codes are dropped
+        # (error frames with func 0x00 are always returned); with addr set,
+        # so are frames from other motors.
+        frame = Extract_Frame(self.ring, self.buf)
+        while frame is not None:
+            if (func is None or frame.func == func or frame.func == 0x00) and (addr is None or frame.addr == addr):
+                return frame
+            frame = Extract_Frame(self.ring, self.buf)
+        return None
+
+    def clear(self):  # Drop buffered bytes, e.g. before sending a new request
+        self.ring.clear()
+
+    async def frame(self, func=None, timeout_ms=100, addr=None):  # Wait for the next frame, None on timeout
+        try:
+            return await _wait_for_ms(self._next(func, addr), timeout_ms)
+        except asyncio.TimeoutError:
+            return None
+
+class IrqReceiver(_Receiver):
+    def __init__(self, uart, size=256, trigger=None, callback=None):
+        _Receiver.__init__(self, size)
+        self.uart = uart
+        self.callback = callback  # Called with each frame from the IRQ handler, None to queue for get()
+        self.irqs = 0
+        if trigger is None:
+            trigger = getattr(UART, "IRQ_RXIDLE", 0) or UART.IRQ_RX  # Idle fires once per reply burst
+        uart.irq(handler=self._irq, trigger=trigger)
+
+    def _irq(self, uart):  # Soft IRQ: move the FIFO into the ring and signal complete frames
+        self.irqs += 1
+        ring = self.ring
+        ring.fill(self.uart)
+        if not ring.free():
+            self.overruns += 1  # Ring full, the consumer is falling behind
+        if not _frame_ready(ring):
+            return
+        if self.callback is None:
+            self.flag.set()
+            return
+        frame = Extract_Frame(ring, self.buf)
+        while frame is not None:
+            self.callback(frame)
+            frame = Extract_Frame(ring, self.buf)
+
+    async def _next(self, func, addr):
+        while True:
+            frame = self.get(func, addr)
+            if frame is not None:
+                return frame
+            await self.flag.wait()
+            self.flag.clear()
+
+    def close(self):  # Remove the IRQ handler
+        self.uart.irq(handler=None)
+
+class StreamReceiver(_Receiver):
+    def __init__(self, stream, size=256):
+        _Receiver.__init__(self, size)
+        self.stream = stream  # asyncio.StreamReader(uart) on-device, any StreamReader on the host
+        self._chunk = bytearray(64)
+        self._readinto = getattr(stream, "readinto", None)  # Newer uasyncio: no allocation per read
+
+    async def _fill(self):  # Wait for bytes from the stream and move them into the ring
+        n = min(len(self._chunk), self.ring.free())
+        if n == 0:
+            self.overruns += 1
+            self.ring.clear()  # Full ring with no decodable frame in it, start over
+            return
+        if self._readinto is not None:
+            got = await self._readinto(memoryview(self._chunk)[:n])
+            data = memoryview(self._chunk)[:got]
+        else:
+            data = await self.stream.read(n)
+        if not data:
+            raise OSError("stream closed")
+        self.ring.write(data)
+
+    async def _next(self, func, addr):
+        while True:
+            frame = self.get(func, addr)
+            if frame is not None:
+                return frame
+            await self._fill()